@@ -0,0 +1,74 @@
+"""
+    Сравнение бэкендов инференса с эталонным fp32 PyTorch на фиксированном наборе заголовков:
+    скорость, максимальное расхождение вероятностей и совпадение итоговой метки.
+
+    Запуск из корня репозитория:
+        py -m benchmarks.backend_parity --backends torch torch_int8 onnx --threads 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mood.mood import SentimentAnalysis, LABELS
+
+PARITY_HEADLINES = [
+    "Bitcoin is looking strong today, might break $70k soon!",
+    "Exchange hacked, millions in ETH stolen",
+    "Ethereum price unchanged ahead of the upgrade",
+    "SEC delays decision on Solana ETF",
+    "Ripple wins partial victory in court against regulators",
+    "Dogecoin surges 20% after Musk tweet",
+    "Tether mints another $1B USDT on Tron",
+    "Crypto market sheds $200 billion as liquidations pile up",
+    "BTC miners capitulate as hashprice hits record low",
+    "Analysts see no clear direction for XRP this week",
+    "Whales accumulate ETH while retail panics",
+    "Solana network suffers another outage",
+    "Bitcoin ETF inflows hit a new all-time high",
+    "Regulators propose stricter rules for stablecoins",
+    "DOGE holders remain optimistic despite the dip",
+    "Major bank launches crypto custody service for clients",
+]
+
+
+def run_backend(name, texts, threads, batch_size, repeats):
+    model = SentimentAnalysis(backend=name, num_threads=threads)
+    model.warmup()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        probs = model.predict_proba(texts, batch_size=batch_size)
+        timings.append(time.perf_counter() - started)
+    return probs, min(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--backends", nargs="+", default=["torch", "torch_int8", "onnx"])
+    arg_parser.add_argument("--threads", type=int, default=None)
+    arg_parser.add_argument("--batch-size", type=int, default=16)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    texts = PARITY_HEADLINES
+    reference, reference_time = run_backend("torch", texts, args.threads, args.batch_size, args.repeats)
+    print(f"{'backend':<12} {'сек/набор':>10} {'ускорение':>10} {'max |dp|':>10} {'метки':>8}")
+    for name in args.backends:
+        if name == "torch":
+            probs, elapsed = reference, reference_time
+        else:
+            try:
+                probs, elapsed = run_backend(name, texts, args.threads, args.batch_size, args.repeats)
+            except ImportError as e:
+                print(f"{name:<12} пропущен: {e}")
+                continue
+        max_diff = float(np.abs(probs - reference).max())
+        agreement = float(np.mean(probs.argmax(axis=1) == reference.argmax(axis=1)))
+        print(f"{name:<12} {elapsed:>10.3f} {reference_time / elapsed:>9.2f}x {max_diff:>10.4f} {agreement:>7.0%}")
+
+    print("Метки:", ", ".join(LABELS))
+
+
+if __name__ == "__main__":
+    main()
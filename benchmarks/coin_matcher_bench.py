@@ -0,0 +1,64 @@
+"""
+    Микро-бенчмарк поиска монет: прежний перебор подстрок против CoinMatcher.
+
+    Запуск из корня репозитория:
+        py -m benchmarks.coin_matcher_bench --texts 20000 --extra-coins 300
+"""
+import argparse
+import random
+import time
+
+from parser.coin_matcher import CoinMatcher
+from parser.news_parser import COIN_KEYWORDS
+
+
+def legacy_find(text, coin_keywords):
+    """Прежняя реализация CryptoPanicParser.extract_coin (без тегов): подстрока для каждого ключевого слова."""
+    text = text.lower()
+    return {coin for coin, keywords in coin_keywords.items() if any(keyword in text for keyword in keywords)}
+
+
+def make_keywords(extra_coins, seed=0):
+    """COIN_KEYWORDS плюс extra_coins синтетических тикеров, чтобы оценить рост на сотнях монет."""
+    rng = random.Random(seed)
+    coin_keywords = dict(COIN_KEYWORDS)
+    for i in range(extra_coins):
+        ticker = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 5))) + str(i)
+        coin_keywords[f"Coin{i}"] = [f"coin{i}", ticker, f"{ticker}/usdt", f"{ticker}usdt"]
+    return coin_keywords
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    words = ["market", "price", "rally", "solution", "method", "whales", "etf", "inflow", "regulators",
+             "bitcoin", "btc", "eth", "solana", "xrp", "doge", "usdt", "breaks", "support", "record"]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() for _ in range(count)]
+
+
+def bench(label, func, texts):
+    started = time.perf_counter()
+    found = [func(text) for text in texts]
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {elapsed * 1000:9.1f} ms  {len(texts) / elapsed:12.0f} текстов/с")
+    return found
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--texts", type=int, default=20000)
+    arg_parser.add_argument("--extra-coins", type=int, default=300)
+    args = arg_parser.parse_args()
+
+    texts = make_texts(args.texts)
+    for extra_coins in sorted({0, args.extra_coins}):
+        coin_keywords = make_keywords(extra_coins)
+        matcher = CoinMatcher(coin_keywords)
+        print(f"Монет: {len(coin_keywords)}, текстов: {len(texts)}")
+        legacy = bench("legacy", lambda text: legacy_find(text, coin_keywords), texts)
+        compiled = bench("CoinMatcher", matcher.find, texts)
+        false_hits = sum(len(old - new) for old, new in zip(legacy, compiled))
+        print(f"Ложных срабатываний прежней реализации: {false_hits}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+    Воспроизводимый бенчмарк конвейера ingest -> score -> aggregate на синтетических постах CryptoPanic.
+
+    Стадии: extract_coin, cryptopanic_save_news, get_news_by_currency, group_and_analyze_news.
+    Каждая запускается на временном файле SQLite; для стадии считаются пропускная способность,
+    задержки p50/p99 и пиковый RSS процесса. По умолчанию вместо модели - детерминированная
+    заглушка FakeSentimentModel, чтобы мерить накладные расходы конвейера, а не RoBERTa;
+    --real-model включает настоящую модель, если её веса уже есть в локальном кэше Hugging Face.
+
+    Запуск из корня репозитория:
+        py -m benchmarks.pipeline_bench --rows 100000 --output bench_results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from loggings import LoggerManager, memory_usage_mb
+from mood.mood import LABELS
+
+TITLE_WORDS = ["market", "price", "rally", "dump", "whales", "etf", "inflows", "outflows", "regulators", "hack",
+               "record", "support", "resistance", "breakout", "liquidations", "upgrade", "lawsuit", "adoption"]
+COIN_TAGS = [("BTC", "Bitcoin"), ("ETH", "Ethereum"), ("SOL", "Solana"), ("XRP", "Ripple"), ("DOGE", "Dogecoin"), ("USDT", "Tether")]
+SOURCES = ["coindesk.com", "cointelegraph.com", "decrypt.co", "theblock.co", "u.today"]
+
+
+class FakeSentimentModel:
+    """Детерминированная заглушка SentimentAnalysis: вероятности из хэша текста, без загрузки модели."""
+
+    model_key = "fake/deterministic@1"
+
+    def predict_proba(self, texts, batch_size=32):
+        logits = np.array(
+            [[(zlib.crc32(text.encode("utf-8")) >> shift) % 1000 / 250.0 for shift in (0, 10, 20)] for text in texts],
+            dtype=np.float32,
+        ).reshape(len(texts), len(LABELS))
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def warmup(self, text="warmup"):
+        return 0.0
+
+    def close(self):
+        pass
+
+
+def synthetic_posts(count, days=7, seed=0, start_id=1):
+    """Генератор постов в формате API CryptoPanic, равномерно распределённых по последним days суткам (новые первыми)."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    step = timedelta(days=days) / max(count, 1)
+    for i in range(count):
+        tags = rng.sample(COIN_TAGS, k=rng.choice((0, 1, 1, 1, 2)))
+        mentioned = rng.choice(COIN_TAGS)[rng.randint(0, 1)] if rng.random() < 0.5 else ""
+        words = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(5, 12)))
+        post_id = start_id + i
+        yield {
+            "kind": "news",
+            "domain": rng.choice(SOURCES),
+            "id": post_id,
+            "title": f"{mentioned} {words} #{post_id}".strip(),
+            "url": f"https://cryptopanic.com/news/{post_id}/",
+            "published_at": (now - step * i).isoformat().replace("+00:00", "Z"),
+            "created_at": (now - step * i).isoformat().replace("+00:00", "Z"),
+            "currencies": [{"code": code, "title": title, "slug": title.lower()} for code, title in tags] or None,
+            "votes": {"positive": rng.randint(0, 20), "negative": rng.randint(0, 20), "important": 0},
+        }
+
+
+def summarize(name, latencies, items):
+    """Сводка стадии: items - число обработанных элементов (постов, строк), latencies - секунды на вызов."""
+    latencies = np.asarray(latencies, dtype=np.float64)
+    total = float(latencies.sum())
+    result = {
+        "stage": name,
+        "calls": int(latencies.size),
+        "items": int(items),
+        "seconds": round(total, 4),
+        "throughput_per_s": round(items / total, 1) if total else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies.size else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3) if latencies.size else None,
+        "peak_rss_mb": memory_usage_mb(),
+    }
+    print(
+        f"{name:<28} {result['items']:>9} шт. {result['seconds']:>9.3f} с "
+        f"{result['throughput_per_s'] or 0:>12.1f}/с  p50 {result['p50_ms'] or 0:>9.3f} мс  "
+        f"p99 {result['p99_ms'] or 0:>9.3f} мс  RSS {result['peak_rss_mb']} МБ"
+    )
+    return result
+
+
+def real_model_available(model_name):
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(model_name, "config.json"), str)
+
+
+def run(args):
+    # В режиме --real-model веса берутся только из локального кэша, без обращения к сети
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    from sentiment_app import MainApp
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = MainApp(batch_size=args.batch_size, window_hours=args.window_hours, db_path=os.path.join(tmp_dir, "bench.db"))
+        if args.real_model:
+            if not real_model_available(app.sentiment_analysis.model_name):
+                print("Веса модели не найдены в локальном кэше Hugging Face, --real-model пропущен")
+                app.sentiment_analysis = FakeSentimentModel()
+            else:
+                app.sentiment_analysis.warmup()
+        else:
+            app.sentiment_analysis = FakeSentimentModel()
+        data_base, parser = app.data_base, app.parser
+
+        # 1. extract_coin
+        latencies = []
+        for post in synthetic_posts(min(args.rows, args.extract_sample), days=args.days, seed=args.seed):
+            text = post["title"] + " " + post.get("summary", "")
+            started = time.perf_counter()
+            parser.extract_coin(text, post.get("currencies"))
+            latencies.append(time.perf_counter() - started)
+        results.append(summarize("extract_coin", latencies, len(latencies)))
+
+        # 2. cryptopanic_save_news пачками, как их отдаёт загрузчик
+        latencies = []
+        batch = []
+        for post in synthetic_posts(args.rows, days=args.days, seed=args.seed):
+            batch.append(post)
+            if len(batch) == args.ingest_batch:
+                started = time.perf_counter()
+                data_base.cryptopanic_save_news(batch, parser.extract_coin)
+                latencies.append(time.perf_counter() - started)
+                batch = []
+        if batch:
+            started = time.perf_counter()
+            data_base.cryptopanic_save_news(batch, parser.extract_coin)
+            latencies.append(time.perf_counter() - started)
+        results.append(summarize("cryptopanic_save_news", latencies, args.rows))
+
+        # 3. get_news_by_currency
+        latencies = []
+        rows = 0
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            grouped = data_base.get_news_by_currency(hours=args.window_hours)
+            latencies.append(time.perf_counter() - started)
+            rows += sum(len(items) for items in grouped.values())
+        results.append(summarize("get_news_by_currency", latencies, rows))
+
+        # 4. group_and_analyze_news: первый прогон оценивает всё окно, остальные берут оценки из кэша
+        for label, repeats in (("group_and_analyze_news cold", 1), ("group_and_analyze_news warm", args.repeats)):
+            latencies = []
+            pairs = 0
+            for _ in range(repeats):
+                started = time.perf_counter()
+                app.group_and_analyze_news()
+                latencies.append(time.perf_counter() - started)
+                pairs += app.last_pass_stats.get("pairs", 0)
+            results.append(summarize(label, latencies, pairs))
+
+        db_size_mb = round(data_base.file_size() / 1024 / 1024, 2)
+        data_base.close()  # Соединения держат файл открытым; на Windows иначе не удалить временный каталог
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "model": "real" if args.real_model and not isinstance(app.sentiment_analysis, FakeSentimentModel) else "fake",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "db_size_mb": db_size_mb,
+        "stages": results,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк конвейера ingest -> score -> aggregate")
+    arg_parser.add_argument("--rows", type=int, default=10_000, help="Синтетических постов (10^3 - 10^6)")
+    arg_parser.add_argument("--days", type=float, default=7, help="За сколько суток распределены посты")
+    arg_parser.add_argument("--window-hours", type=int, default=12)
+    arg_parser.add_argument("--ingest-batch", type=int, default=1000, help="Постов в одном вызове cryptopanic_save_news")
+    arg_parser.add_argument("--extract-sample", type=int, default=50_000, help="Постов для замера extract_coin")
+    arg_parser.add_argument("--batch-size", type=int, default=32)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--real-model", action="store_true", help="Настоящая модель, если веса есть в локальном кэше")
+    arg_parser.add_argument("--verbose", action="store_true", help="Не отключать INFO-логи конвейера")
+    arg_parser.add_argument("--output", help="Файл для результатов в JSON")
+    args = arg_parser.parse_args()
+
+    if not args.verbose:
+        # Сводки конвейера на каждый прогон заглушают таблицу результатов
+        LoggerManager().get_named_logger("news_analyzer").setLevel(logging.WARNING)
+    report = run(args)
+    LoggerManager.shutdown()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,67 @@
-import os, json
-from datetime import datetime, timezone
+import os, sys, json, time
+import threading
+from datetime import datetime, timedelta, timezone
 import sqlite3
 from loggings import LoggerManager
+from metrics import REGISTRY, timed
 from dateutil import parser as date_parser
 import pytz
+import numpy as np
 
 from parser.config import COIN_KEYWORDS
+from mood.mood import LABELS
 
 logger = LoggerManager().get_named_logger("news_analyzer")
 
+HISTORY_COLUMNS = (
+    'coin', 'ts',
+    'all_negative', 'all_neutral', 'all_positive',
+    'strong_negative', 'strong_neutral', 'strong_positive',
+    'count_negative', 'count_neutral', 'count_positive', 'count_undefined',
+)
+
+DB_QUERY_SECONDS = REGISTRY.histogram("db_query_seconds", "Время основных операций с БД, сек")
+NEWS_SAVED = REGISTRY.counter("db_news_saved_total", "Новости, переданные на запись: добавленные (inserted) и уже известные (skipped)")
+DB_ERRORS = REGISTRY.counter("db_errors_total", "Ошибки SQLite при записи и очистке новостей")
+NEWS_REMOVED = REGISTRY.counter("db_news_removed_total", "Новости, удалённые политикой хранения: deleted или archived")
+
+# Состояние загрузки источника. resume_* - продолжение догрузки: если после простоя новых постов больше,
+# чем помещается в MAX_PAGES страниц, следующая страница и нижняя граница пропуска сохраняются здесь
+FETCH_STATE_COLUMNS = (
+    'last_published_at', 'last_post_id', 'etag', 'last_modified',
+    'resume_url', 'resume_published_at', 'resume_post_id',
+)
+
+# Столбцы, которые политика хранения переносит в архив
+ARCHIVE_COLUMNS = {
+    'news': "id, title, url, published_at, currency, summary, content",
+    'news_currency': "news_id, currency, published_at",
+    'news_sentiment': "news_id, model, negative, neutral, positive",
+}
+
+SQL_PARAMS_CHUNK = 900  # SQLite ограничивает число параметров в одном запросе (999 в старых сборках)
+
+def to_utc_string(published_at):
+    """
+        Приводит время публикации к строке UTC '%Y-%m-%d %H:%M:%S'; None, если время не удалось разобрать.
+        CryptoPanic отдаёт ISO-8601, который разбирается datetime.fromisoformat; dateutil - только для прочих форматов.
+        Суффикс 'Z' заменяется на '+00:00' явно: fromisoformat понимает его только начиная с Python 3.11.
+    """
+    try:
+        if isinstance(published_at, str) and published_at.endswith("Z"):
+            published_at = published_at[:-1] + "+00:00"
+        published_dt = datetime.fromisoformat(published_at)
+    except (TypeError, ValueError):
+        try:
+            published_dt = date_parser.parse(published_at)
+        except Exception as e:
+            # Сырую строку не сохраняем: в SQL-сравнениях окна она сортируется как произвольный текст
+            logger.warning(f"Ошибка при парсинге времени {published_at!r}: {e}")
+            return None
+    if published_dt.tzinfo is None:
+        published_dt = published_dt.replace(tzinfo=timezone.utc)
+    return published_dt.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
 def convert_time_to_local(utc_time_str, timezone='Asia/Irkutsk'):
     try:
         utc_time = date_parser.parse(utc_time_str)
@@ -19,39 +72,67 @@ def convert_time_to_local(utc_time_str, timezone='Asia/Irkutsk'):
         return utc_time_str
 
 class MainDatabase():
-    """Для SQLite безопаснее и проще — использовать соединение внутри каждого метода, особенно в многопоточном окружении."""
-
-    _instance = None  # Храним единственный экземпляр
-
-    # def __new__(cls):
-    #     if cls._instance is None:
-    #         logger.info("Создание соединения с основной БД")
-    #         cls._instance = super().__new__(cls) # Создаём объект один раз
-    #         db_path = ('cryptonews.db')
-    #         cls._instance.connection = sqlite3.connect(db_path) # Открываем одно соединение
-    #         cls._instance.cursor = cls._instance.connection.cursor()
-    #         cls._instance.connection.execute("PRAGMA foreign_keys = ON")  # Включаем поддержку внешних ключей
-
-    #     return cls._instance  # Возвращаем тот же объект
-
-    def __init__(self):
-        # if not hasattr(self, "initialized"):  # Чтобы __init__ не вызывался повторно
-        self.db_path = 'cryptonews.db'
-        self.create_table_news()
-            
-            # self.initialized = True  # Пометка, что init уже был выполнен
- 
+    """
+        Доступ к SQLite. Каждый поток получает своё соединение, которое открывается один раз и переиспользуется
+        всеми методами (SQLite-соединение нельзя делить между потоками, а открывать новое на каждый запрос дорого).
+        Схема создаётся один раз на файл БД за время работы процесса.
+    """
+
+    # Прагмы каждого нового соединения: WAL + synchronous=NORMAL - fsync только на контрольных точках,
+    # кэш страниц 16 МБ на соединение, чтение файла через mmap до 256 МБ
+    CONNECTION_PRAGMAS = (
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 268435456",
+        "PRAGMA temp_store = MEMORY",
+    )
+    BUSY_TIMEOUT = 10  # Сколько секунд ждать блокировку записи другим соединением
+
+    _initialized_paths = set()  # Файлы БД, для которых схема уже создана в этом процессе
+    _init_lock = threading.Lock()
+
+    def __init__(self, db_path='cryptonews.db'):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []  # Все открытые соединения (по одному на поток) - для close()
+        self._connections_lock = threading.Lock()
+
+        key = os.path.abspath(db_path)
+        with self._init_lock:
+            if key not in self._initialized_paths:
+                self.create_table_news()
+                self._initialized_paths.add(key)
+
     def get_connection(self):
-            conn = sqlite3.connect(self.db_path)
-            conn.execute("PRAGMA foreign_keys = ON")
-            return conn
-    
+        """Соединение текущего потока (создаётся при первом обращении)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # check_same_thread=False только ради close() из другого потока; запросы идут из потока-владельца
+            connection = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT, check_same_thread=False)
+            for pragma in self.CONNECTION_PRAGMAS:
+                connection.execute(pragma)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        """Закрывает соединения всех потоков; после этого потоки откроют новые при следующем запросе."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
     def create_table_news(self):
         """
-        
+            Создаёт таблицы и индексы, если их нет, и включает WAL и инкрементальную очистку файла.
         """
         connection = self.get_connection()
         cursor = connection.cursor()
+        self._check_auto_vacuum(cursor)
+        cursor.execute("PRAGMA journal_mode=WAL")  # Запись не блокирует читателей; режим сохраняется в файле БД
         cursor.execute('''
                 CREATE TABLE IF NOT EXISTS news (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -63,78 +144,596 @@ class MainDatabase():
                     content TEXT
                 )
             ''')
-        
+        # Кэш оценок модели: одна строка на новость и модель (имя@ревизия).
+        # title_key - хэш нормализованного заголовка: по нему находится оценка того же заголовка другой новости
+        cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_sentiment (
+                    news_id INTEGER NOT NULL REFERENCES news(id) ON DELETE CASCADE,
+                    model TEXT NOT NULL,
+                    negative REAL,
+                    neutral REAL,
+                    positive REAL,
+                    title_key INTEGER,
+                    PRIMARY KEY (news_id, model)
+                )
+            ''')
+        cursor.execute("PRAGMA table_info(news_sentiment)")
+        if 'title_key' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE news_sentiment ADD COLUMN title_key INTEGER")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_sentiment_title ON news_sentiment (title_key, model)")
+        # Нормализованная связь новость <-> монета; published_at продублирован для индекса окна
+        cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_currency (
+                    news_id INTEGER NOT NULL REFERENCES news(id) ON DELETE CASCADE,
+                    currency TEXT NOT NULL,
+                    published_at TEXT,
+                    PRIMARY KEY (news_id, currency)
+                )
+            ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_currency_window ON news_currency (currency, published_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_published_at ON news (published_at)")
+        # Состояние инкрементальной загрузки по источникам: последняя сохранённая новость и заголовки кэширования
+        cursor.execute('''
+                CREATE TABLE IF NOT EXISTS fetch_state (
+                    source TEXT PRIMARY KEY,
+                    last_published_at TEXT,
+                    last_post_id INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    resume_url TEXT,
+                    resume_published_at TEXT,
+                    resume_post_id INTEGER
+                )
+            ''')
+        cursor.execute("PRAGMA table_info(fetch_state)")
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in (('resume_url', 'TEXT'), ('resume_published_at', 'TEXT'), ('resume_post_id', 'INTEGER')):
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE fetch_state ADD COLUMN {column} {column_type}")
+        # Временной ряд результатов анализа: одна компактная строка на монету и момент публикации
+        cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sentiment_history (
+                    coin TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    all_negative REAL,
+                    all_neutral REAL,
+                    all_positive REAL,
+                    strong_negative REAL,
+                    strong_neutral REAL,
+                    strong_positive REAL,
+                    count_negative INTEGER,
+                    count_neutral INTEGER,
+                    count_positive INTEGER,
+                    count_undefined INTEGER,
+                    PRIMARY KEY (coin, ts)
+                ) WITHOUT ROWID
+            ''')
+        self._backfill_news_currency(cursor)
+
         connection.commit()
-        connection.close()
+
+    def _check_auto_vacuum(self, cursor):
+        """
+            auto_vacuum=INCREMENTAL позволяет возвращать свободные страницы файлу через PRAGMA incremental_vacuum.
+            Новая БД создаётся сразу в этом режиме; существующую нужно один раз перестроить (convert_to_incremental_vacuum) -
+            при запуске это не делается, потому что VACUUM долгий и требует ещё столько же места на диске.
+        """
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] == 2:
+            return
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+        if not cursor.fetchone()[0]:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        else:
+            logger.info(
+                f"БД {self.db_path} без auto_vacuum=INCREMENTAL: место после очистки старых новостей не вернётся файлу. "
+                f"Для перевода выполните при остановленном приложении: py db_sentiment_app.py --convert-vacuum"
+            )
+
+    def convert_to_incremental_vacuum(self):
+        """
+            Разовое обслуживание: переводит существующую БД в auto_vacuum=INCREMENTAL полной перестройкой (VACUUM).
+            Блокирует БД на время перестройки и временно требует свободного места размером с файл БД.
+        """
+        connection = self.get_connection()
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        started = time.perf_counter()
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+        logger.info(f"БД {self.db_path} перестроена для auto_vacuum=INCREMENTAL за {time.perf_counter() - started:.1f} с")
+        return True
+
+    def _backfill_news_currency(self, cursor):
+        """Заполняет news_currency для новостей, сохранённых до появления таблицы (только строка currency)."""
+        cursor.execute('''
+            SELECT id, currency, published_at FROM news
+            WHERE NOT EXISTS (SELECT 1 FROM news_currency nc WHERE nc.news_id = news.id)
+        ''')
+        rows = [
+            (news_id, coin.strip(), published_at)
+            for news_id, currency_str, published_at in cursor.fetchall()
+            for coin in (currency_str or "").split(",") if coin.strip()
+        ]
+        if rows:
+            cursor.executemany("INSERT OR IGNORE INTO news_currency (news_id, currency, published_at) VALUES (?, ?, ?)", rows)
+            logger.info(f"Таблица news_currency дополнена: {len(rows)} связей")
 
     
     def cryptopanic_save_news(self, news_items, extract_coin_func):
         """
-            Добавление новости из CryptoPanic
+            Пакетное добавление новостей из CryptoPanic.
+
+            Уже известные URL отсекаются одним запросом, новые строки собираются в памяти и вставляются
+            через executemany в одной транзакции. Возвращает список id добавленных новостей.
         """
+        started = time.perf_counter()
+        posts = news_items[::-1]  # Старые новости первыми, чтобы id росли вместе со временем публикации
+
         connection = self.get_connection()
         cursor = connection.cursor()
-        news_items = news_items[::-1]
-        for post in news_items:
-            title = post.get("title", "")
-            url = post.get("url", "")
-
-            # Преобразуем время в UTC
-            try:
-                published_dt = date_parser.parse(post.get("published_at", ""))
-                published_utc = published_dt.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-            except Exception as e:
-                logger.warning(f"Ошибка при парсинге времени: {e}")
-                published_utc = post.get("published_at", "")  # fallback
-            summary = post.get("summary", "")
-
-            # Определяем валюты
-            currency_list = extract_coin_func(title + " " + summary, post.get("currencies"))
-            currency_str = ", ".join(currency_list)  # Преобразуем список в строку
-            content = ""
-
-            try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO news (title, url, published_at, currency, summary, content)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (title, url, published_utc, currency_str, summary, content))
-                logger.info(f"✅ Сохранена новость: [{currency_str}] {title}")
-            except sqlite3.Error as e:
-                logger.error(f"Ошибка записи в БД: {e}")
-        
-        connection.commit()
-        connection.close()
+        inserted_ids = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            known_urls = self._select_known_urls(cursor, [post.get("url", "") for post in posts])
+
+            rows = []
+            currencies_by_url = {}
+            for post in posts:
+                url = post.get("url", "")
+                if url in known_urls:
+                    continue
+                known_urls.add(url)  # Дубликаты внутри пачки
+
+                title = post.get("title", "")
+                summary = post.get("summary", "")
+                published_utc = to_utc_string(post.get("published_at", ""))
+
+                # Определяем валюты
+                currency_list = extract_coin_func(title + " " + summary, post.get("currencies"))
+                currencies_by_url[url] = (currency_list, published_utc)
+                rows.append((title, url, published_utc, ", ".join(currency_list), summary, ""))
+
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM news")
+            last_id = cursor.fetchone()[0]
+            cursor.executemany("""
+                INSERT OR IGNORE INTO news (title, url, published_at, currency, summary, content)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            # Транзакция захвачена на запись, поэтому всё, что выше last_id, вставлено этой пачкой
+            cursor.execute("SELECT id, url FROM news WHERE id > ? ORDER BY id", (last_id,))
+            currency_rows = []
+            for news_id, url in cursor.fetchall():
+                inserted_ids.append(news_id)
+                currency_list, published_utc = currencies_by_url[url]
+                currency_rows.extend((news_id, coin, published_utc) for coin in currency_list)
+            cursor.executemany(
+                "INSERT OR IGNORE INTO news_currency (news_id, currency, published_at) VALUES (?, ?, ?)",
+                currency_rows
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            inserted_ids = []
+            DB_ERRORS.inc(operation="save_news")
+            logger.error(f"Ошибка записи в БД: {e}")
+        except BaseException:
+            connection.rollback()  # Соединение переиспользуется, незавершённая транзакция блокировала бы следующие
+            raise
+
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(elapsed, operation="save_news")
+        NEWS_SAVED.inc(len(inserted_ids), result="inserted")
+        NEWS_SAVED.inc(len(posts) - len(inserted_ids), result="skipped")
+        logger.info(
+            f"✅ Сохранено новостей: {len(inserted_ids)}, пропущено (уже в БД): {len(posts) - len(inserted_ids)}, "
+            f"за {elapsed:.3f} с"
+        )
+        return inserted_ids
+
+    def get_news_ids_by_urls(self, urls):
+        """id новостей с указанными URL (в порядке id); неизвестные URL пропускаются."""
+        urls = list(set(urls))
+        connection = self.get_connection()
+        cursor = connection.cursor()
+        news_ids = []
+        for start in range(0, len(urls), SQL_PARAMS_CHUNK):
+            chunk = urls[start:start + SQL_PARAMS_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT id FROM news WHERE url IN ({placeholders})", chunk)
+            news_ids.extend(news_id for (news_id,) in cursor.fetchall())
+        return sorted(news_ids)
+
+    def get_known_urls(self, urls):
+        """Множество URL из списка, которые уже сохранены в БД."""
+        connection = self.get_connection()
+        return self._select_known_urls(connection.cursor(), urls)
+
+    def _select_known_urls(self, cursor, urls):
+        """Возвращает множество URL из списка, которые уже есть в таблице news."""
+        urls = list(set(urls))
+        known = set()
+        for start in range(0, len(urls), SQL_PARAMS_CHUNK):
+            chunk = urls[start:start + SQL_PARAMS_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT url FROM news WHERE url IN ({placeholders})", chunk)
+            known.update(url for (url,) in cursor.fetchall())
+        return known
+
+    @timed(DB_QUERY_SECONDS, operation="news_by_currency")
+    def get_news_by_currency(self, coin_keywords=COIN_KEYWORDS, hours=12):
+        """
+            Новости за последние hours часов, сгруппированные по монетам: {coin: [(id, title, currency, published_at), ...]}.
+            Один параметризованный запрос по индексу news_currency (currency, published_at).
+        """
+        coins = list(coin_keywords)
+        results = {coin: [] for coin in coins}
+        if not coins:
+            return results
+
+        connection = self.get_connection()
+        cursor = connection.cursor()
+
+        placeholders = ", ".join("?" * len(coins))
+        cursor.execute(f'''
+            SELECT nc.currency, n.id, n.title, n.currency, n.published_at
+            FROM news_currency nc
+            JOIN news n ON n.id = nc.news_id
+            WHERE nc.currency IN ({placeholders})
+            AND nc.published_at >= datetime('now', ?)
+            ORDER BY nc.currency, nc.published_at DESC
+        ''', (*coins, f"-{hours} hours"))
+        for coin, *news_item in cursor.fetchall():
+            results[coin].append(tuple(news_item))
+
+        for coin, news_items in results.items():
+            if not news_items:
+                logger.debug(f"Нет новостей для {coin} за последние {hours} часов.")
+        return results
 
+    @timed(DB_QUERY_SECONDS, operation="news_by_ids")
+    def get_news_by_ids(self, news_ids, coin_keywords=COIN_KEYWORDS):
+        """
+            Указанные новости, сгруппированные по монетам в том же формате, что и get_news_by_currency.
+            Используется для инкрементального анализа только что добавленных записей.
+        """
+        coins = list(coin_keywords)
+        results = {coin: [] for coin in coins}
+        news_ids = list(news_ids)
+        if not coins or not news_ids:
+            return results
+
+        connection = self.get_connection()
+        cursor = connection.cursor()
+
+        coin_placeholders = ", ".join("?" * len(coins))
+        for start in range(0, len(news_ids), SQL_PARAMS_CHUNK - len(coins)):
+            chunk = news_ids[start:start + SQL_PARAMS_CHUNK - len(coins)]
+            id_placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT nc.currency, n.id, n.title, n.currency, n.published_at
+                FROM news_currency nc
+                JOIN news n ON n.id = nc.news_id
+                WHERE nc.news_id IN ({id_placeholders})
+                AND nc.currency IN ({coin_placeholders})
+                ORDER BY nc.currency, nc.published_at DESC
+            ''', (*chunk, *coins))
+            for coin, *news_item in cursor.fetchall():
+                results[coin].append(tuple(news_item))
+        return results
 
-    def get_news_by_currency(self, coin_keywords=COIN_KEYWORDS):
-        
+    def get_fetch_state(self, source):
+        """Состояние загрузки источника: {столбец из FETCH_STATE_COLUMNS: значение} (None, если нет)."""
         connection = self.get_connection()
         cursor = connection.cursor()
+        cursor.execute(f"SELECT {', '.join(FETCH_STATE_COLUMNS)} FROM fetch_state WHERE source = ?", (source,))
+        row = cursor.fetchone()
+        return dict(zip(FETCH_STATE_COLUMNS, row or (None,) * len(FETCH_STATE_COLUMNS)))
+
+    def save_fetch_state(self, source, **fields):
+        """Обновляет переданные поля состояния загрузки источника (остальные не трогает)."""
+        fields = {key: value for key, value in fields.items() if key in FETCH_STATE_COLUMNS}
+        if not fields:
+            return
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" * len(fields))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in fields)
 
-        results={}
-        # Поочередно для каждой монеты в COIN_KEYWORDS
-        for coin, keywords in coin_keywords.items():
-            # Строим строку для поиска по валюте
-            currency_search = "|".join(keywords)  # Это будет искать по ключевым словам монеты
+        connection = self.get_connection()
+        try:
+            connection.execute(f'''
+                INSERT INTO fetch_state (source, {columns}) VALUES (?, {placeholders})
+                ON CONFLICT(source) DO UPDATE SET {updates}
+            ''', (source, *fields.values()))
+            connection.commit()
+        except sqlite3.Error:
+            connection.rollback()
+            raise
+
+    def save_sentiment_snapshot(self, ts, results_by_coin):
+        """
+            Сохраняет результаты анализа на момент ts (unix-время, сек).
+            results_by_coin - {coin: (average_all, average_strong, count_stats)}; средние - словари по LABELS или None.
+        """
+        rows = []
+        for coin, (average_all, average_strong, counts) in results_by_coin.items():
+            rows.append((
+                coin, int(ts),
+                *self._label_values(average_all),
+                *self._label_values(average_strong),
+                counts.get('negative', 0), counts.get('neutral', 0), counts.get('positive', 0), counts.get('undefined', 0),
+            ))
+        if not rows:
+            return
+        connection = self.get_connection()
+        try:
+            connection.executemany(f'''
+                INSERT OR REPLACE INTO sentiment_history ({", ".join(HISTORY_COLUMNS)})
+                VALUES ({", ".join("?" * len(HISTORY_COLUMNS))})
+            ''', rows)
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            logger.error(f"Ошибка записи истории настроений в БД: {e}")
+
+    @staticmethod
+    def _label_values(averages):
+        if averages is None:
+            return (None, None, None)
+        return (averages['negative'], averages['neutral'], averages['positive'])
 
-            # Запрос для получения заголовков за последние 12 часов для каждой монеты
+    def get_sentiment_history(self, coin, start_ts=None, end_ts=None, bucket_seconds=None):
+        """
+            История результатов монеты за [start_ts, end_ts] в виде numpy-массивов:
+                ts (N,), average_all (N, 3), average_strong (N, 3), count_stats (N, 4).
+            Отсутствующие средние - NaN. При bucket_seconds (например, 3600) значения усредняются по интервалам
+            средствами SQL, ts - начало интервала.
+        """
+        conditions = ["coin = ?"]
+        params = [coin]
+        if start_ts is not None:
+            conditions.append("ts >= ?")
+            params.append(int(start_ts))
+        if end_ts is not None:
+            conditions.append("ts <= ?")
+            params.append(int(end_ts))
+        where = " AND ".join(conditions)
+        values = HISTORY_COLUMNS[2:]
+
+        if bucket_seconds:
+            bucket = int(bucket_seconds)
             query = f'''
-                SELECT title, currency
-                FROM news
-                WHERE published_at >= datetime('now', '-12 hours')
-                AND currency LIKE '%{coin}%'  -- Проверяем, если в поле currency есть монета
-                ORDER BY published_at DESC;
+                SELECT (ts / {bucket}) * {bucket} AS bucket_ts, {", ".join(f"AVG({column})" for column in values)}
+                FROM sentiment_history
+                WHERE {where}
+                GROUP BY ts / {bucket}
+                ORDER BY bucket_ts
             '''
-            cursor.execute(query)
-            results[coin] = cursor.fetchall()
-            if not results[coin]:
-                logger.debug(f"Нет новостей для {coin} за последние 12 часов.")
-        
-        connection.close()
-        return results
+        else:
+            query = f'''
+                SELECT ts, {", ".join(values)}
+                FROM sentiment_history
+                WHERE {where}
+                ORDER BY ts
+            '''
+
+        connection = self.get_connection()
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(values) + 1)  # None -> NaN
+        return {
+            'ts': data[:, 0].astype(np.int64),
+            'average_all': data[:, 1:4],
+            'average_strong': data[:, 4:7],
+            'count_stats': data[:, 7:11],
+        }
+
+    def get_latest_sentiment(self):
+        """Последняя сохранённая строка истории по каждой монете: {coin: (ts, average_all, average_strong, count_stats)}."""
+        connection = self.get_connection()
+        cursor = connection.cursor()
+        cursor.execute(f'''
+            SELECT {", ".join(HISTORY_COLUMNS)}
+            FROM sentiment_history h
+            WHERE ts = (SELECT MAX(ts) FROM sentiment_history WHERE coin = h.coin)
+        ''')
+        rows = cursor.fetchall()
+
+        latest = {}
+        for coin, ts, *values in rows:
+            average_all = None if values[0] is None else dict(zip(LABELS, values[0:3]))
+            average_strong = None if values[3] is None else dict(zip(LABELS, values[3:6]))
+            counts = dict(zip(LABELS + ['undefined'], values[6:10]))
+            latest[coin] = (ts, average_all, average_strong, counts)
+        return latest
+
+    def get_cached_sentiments(self, news_ids, model_key):
+        """
+            Возвращает сохранённые оценки {news_id: (negative, neutral, positive)} для указанной модели.
+            Новости без оценки в словарь не попадают.
+        """
+        news_ids = list(news_ids)
+        connection = self.get_connection()
+        cursor = connection.cursor()
+
+        cached = {}
+        for start in range(0, len(news_ids), SQL_PARAMS_CHUNK):
+            chunk = news_ids[start:start + SQL_PARAMS_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT news_id, negative, neutral, positive
+                FROM news_sentiment
+                WHERE model = ? AND news_id IN ({placeholders})
+            ''', (model_key, *chunk))
+            for news_id, negative, neutral, positive in cursor.fetchall():
+                cached[news_id] = (negative, neutral, positive)
+        return cached
+
+    def get_sentiments_by_title(self, title_keys, model_key):
+        """
+            Оценки, уже посчитанные для заголовков с такими ключами (см. mood.dedup.title_key) у любых новостей:
+            {title_key: (negative, neutral, positive)}. Ключи без оценки в словарь не попадают.
+        """
+        title_keys = list(set(title_keys))
+        connection = self.get_connection()
+        cursor = connection.cursor()
+
+        cached = {}
+        for start in range(0, len(title_keys), SQL_PARAMS_CHUNK):
+            chunk = title_keys[start:start + SQL_PARAMS_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT title_key, negative, neutral, positive
+                FROM news_sentiment
+                WHERE model = ? AND title_key IN ({placeholders})
+            ''', (model_key, *chunk))
+            for key, negative, neutral, positive in cursor.fetchall():
+                cached[key] = (negative, neutral, positive)
+        return cached
+
+    def save_sentiments(self, scores, model_key, title_keys=None):
+        """
+            Сохраняет оценки модели: scores - {news_id: (negative, neutral, positive)},
+            title_keys - {news_id: ключ нормализованного заголовка} для поиска оценки по заголовку.
+        """
+        title_keys = title_keys or {}
+        connection = self.get_connection()
+        try:
+            connection.executemany('''
+                INSERT OR REPLACE INTO news_sentiment (news_id, model, negative, neutral, positive, title_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(news_id, model_key, *map(float, probs), title_keys.get(news_id)) for news_id, probs in scores.items()])
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            logger.error(f"Ошибка записи оценок в БД: {e}")
+
+    def apply_retention(self, days, archive_path=None, batch_size=1000):
+        """
+            Удаляет новости старше days суток вместе с их монетами и оценками, пачками по batch_size
+            (каждая пачка - отдельная короткая транзакция, чтобы не держать блокировку записи).
+            Если задан archive_path, строки перед удалением копируются в отдельный файл SQLite (ATTACH).
+            Возвращает число удалённых новостей.
+        """
+        started = time.perf_counter()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        connection = self.get_connection()
+        cursor = connection.cursor()
+
+        removed = 0
+        attached = False
+        try:
+            if archive_path:
+                cursor.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                attached = True
+                self._create_archive_tables(cursor)
+            while True:
+                cursor.execute("SELECT id FROM news WHERE published_at < ? ORDER BY id LIMIT ?", (cutoff, batch_size))
+                news_ids = [news_id for (news_id,) in cursor.fetchall()]
+                if not news_ids:
+                    break
+                placeholders = ", ".join("?" * len(news_ids))
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    if archive_path:
+                        for table, columns in ARCHIVE_COLUMNS.items():
+                            key = "id" if table == "news" else "news_id"
+                            cursor.execute(
+                                f"INSERT OR IGNORE INTO archive.{table} ({columns}) "
+                                f"SELECT {columns} FROM main.{table} WHERE {key} IN ({placeholders})",
+                                news_ids
+                            )
+                    cursor.execute(f"DELETE FROM main.news_sentiment WHERE news_id IN ({placeholders})", news_ids)
+                    cursor.execute(f"DELETE FROM main.news_currency WHERE news_id IN ({placeholders})", news_ids)
+                    cursor.execute(f"DELETE FROM main.news WHERE id IN ({placeholders})", news_ids)
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+                removed += len(news_ids)
+        except sqlite3.Error as e:
+            DB_ERRORS.inc(operation="retention")
+            logger.error(f"Ошибка очистки старых новостей: {e}")
+        finally:
+            if attached:
+                cursor.execute("DETACH DATABASE archive")
+
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(elapsed, operation="retention")
+        NEWS_REMOVED.inc(removed, action="archived" if archive_path else "deleted")
+        if removed:
+            logger.info(
+                f"🧹 Удалено новостей старше {days} сут.: {removed}"
+                + (f" (перенесены в {archive_path})" if archive_path else "") + f", за {elapsed:.2f} с"
+            )
+        return removed
+
+    @staticmethod
+    def _create_archive_tables(cursor):
+        """Таблицы архива: те же столбцы, что и в основной БД, без индексов окна."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.news (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                published_at TEXT,
+                currency TEXT,
+                summary TEXT,
+                content TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.news_currency (
+                news_id INTEGER NOT NULL,
+                currency TEXT NOT NULL,
+                published_at TEXT,
+                PRIMARY KEY (news_id, currency)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.news_sentiment (
+                news_id INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                negative REAL,
+                neutral REAL,
+                positive REAL,
+                PRIMARY KEY (news_id, model)
+            )
+        ''')
+
+    def incremental_vacuum(self, max_pages=None):
+        """
+            Возвращает файловой системе свободные страницы (не больше max_pages за вызов, None - все)
+            и сбрасывает WAL в основной файл. Возвращает число освобождённых страниц.
+        """
+        connection = self.get_connection()
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA freelist_count")
+        free_pages = cursor.fetchone()[0]
+        if free_pages:
+            # Прагма освобождает по странице на шаг выполнения; execute() делает один шаг, executescript - все
+            connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages or 0)});")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cursor.execute("PRAGMA freelist_count")
+        released = free_pages - cursor.fetchone()[0]
+        if released:
+            logger.info(f"Файлу БД возвращено страниц: {released}, размер {self.file_size() / 1024 / 1024:.1f} МБ")
+        return released
+
+    def file_size(self):
+        """Размер файла БД вместе с WAL, байт."""
+        return sum(
+            os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path)
+        )
 
 if __name__ == "__main__":
     database = MainDatabase()
+    if "--convert-vacuum" in sys.argv:
+        database.convert_to_incremental_vacuum()
+        sys.exit()
     grouped_news = database.get_news_by_currency()
     for currency, news_items in grouped_news.items():
         print(currency, news_items)
\ No newline at end of file
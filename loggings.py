@@ -1,16 +1,59 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import sys
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from threading import Lock
 
 
+class _DispatchHandler(logging.Handler):
+    """Обработчик фонового потока логирования: отдаёт запись обработчикам её логгера (свой файл у каждого)."""
+
+    def __init__(self):
+        super().__init__()
+        self.handlers_by_logger = {}
+
+    def add(self, logger_name, handlers):
+        self.handlers_by_logger[logger_name] = list(handlers)
+
+    def handle(self, record):
+        for handler in self.handlers_by_logger.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self):
+        for handlers in self.handlers_by_logger.values():
+            for handler in handlers:
+                handler.flush()
+
+
+class _ForwardHandler(logging.Handler):
+    """Записи из процессов-воркеров, пришедшие в родитель, отправляются в одноимённые логгеры родителя."""
+
+    def handle(self, record):
+        LoggerManager().get_named_logger(record.name).handle(record)
+
+
 class LoggerManager:
     _instance = None
     _lock = Lock()
     _loggers = {}
+    _listeners = []
 
     LOG_DIR = "logs"
     LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s (%(filename)s:%(lineno)d): %(message)s"
+    # Асинхронный режим: логгеры только кладут запись в общую очередь, файлы и консоль пишет один фоновый поток
+    USE_QUEUE = True
+
+    _queue = None  # Общая очередь всех логгеров процесса
+    _atexit_registered = False
+    _listener = None  # Единственный фоновый поток записи
+    _dispatcher = None  # Обработчики файлов и консоли, которыми владеет фоновый поток
+    _console_handler = None
+    _worker_queue = None  # В родителе: очередь, через которую пишут процессы-воркеры
+    _parent_queue = None  # В воркере: очередь родителя, свои файлы логов не открываются
 
     def __new__(cls):
         with cls._lock:
@@ -26,27 +69,110 @@ class LoggerManager:
         logger.propagate = False  # Чтобы не дублировать в root logger
 
         if not logger.handlers:
-            formatter = logging.Formatter(self.LOG_FORMAT)
+            if self._parent_queue is not None:
+                logger.addHandler(QueueHandler(self._parent_queue))
+                return logger
 
-            # File handler (всё)
+            # File handler (всё); файл открывается при первой записи
             file_handler = RotatingFileHandler(
                 os.path.join(self.LOG_DIR, filename),
                 maxBytes=5 * 1024 * 1024,
                 backupCount=3,
-                encoding='utf-8'
+                encoding='utf-8',
+                delay=True
             )
             file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            file_handler.setFormatter(logging.Formatter(self.LOG_FORMAT))
 
-            # Console handler (всё выше DEBUG)
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            if self.USE_QUEUE:
+                self._start_listener()
+                self._dispatcher.add(name, [file_handler, self._console_handler])
+                logger.addHandler(QueueHandler(self._queue))
+            else:
+                logger.addHandler(file_handler)
+                logger.addHandler(self._get_console_handler())
 
         return logger
 
+    @classmethod
+    def _get_console_handler(cls):
+        # Console handler (всё выше DEBUG), один на все логгеры
+        if cls._console_handler is None:
+            cls._console_handler = logging.StreamHandler()
+            cls._console_handler.setLevel(logging.INFO)
+            cls._console_handler.setFormatter(logging.Formatter(cls.LOG_FORMAT))
+        return cls._console_handler
+
+    @classmethod
+    def _start_listener(cls):
+        """Запускает единственный фоновый поток логирования процесса (при первом логгере)."""
+        with cls._lock:
+            if cls._listener is not None:
+                return
+            cls._get_console_handler()
+            if cls._queue is None:
+                cls._queue = queue.SimpleQueue()
+                cls._dispatcher = _DispatchHandler()
+            # После shutdown() поток запускается заново на той же очереди - уже созданные логгеры продолжают работать
+            cls._listener = QueueListener(cls._queue, cls._dispatcher, respect_handler_level=True)
+            cls._listener.start()
+            cls._register_listener(cls._listener)
+
+    @classmethod
+    def _register_listener(cls, listener):
+        if not cls._atexit_registered:
+            atexit.register(cls.shutdown)
+            cls._atexit_registered = True
+        cls._listeners.append(listener)
+
+    @classmethod
+    def worker_log_queue(cls, context):
+        """
+            Очередь для процессов-воркеров (context - контекст multiprocessing пула): записи из неё
+            пересылаются в логгеры родителя, поэтому файлы логов открывает и ротирует только родитель.
+        """
+        with cls._lock:
+            if cls._worker_queue is None:
+                cls._worker_queue = context.Queue()
+                listener = QueueListener(cls._worker_queue, _ForwardHandler())
+                listener.start()
+                cls._register_listener(listener)
+            return cls._worker_queue
+
+    @classmethod
+    def use_parent_queue(cls, log_queue):
+        """Вызывается в процессе-воркере: все логгеры пишут в очередь родителя вместо своих файлов."""
+        with cls._lock:
+            cls._parent_queue = log_queue
+            listeners, cls._listeners = cls._listeners, []
+            cls._listener = None
+        for listener in listeners:
+            listener.stop()
+        for logger in cls._loggers.values():
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            logger.addHandler(QueueHandler(log_queue))
+        if cls._dispatcher is not None:
+            for handlers in cls._dispatcher.handlers_by_logger.values():
+                handlers[0].close()  # Файловые обработчики (delay=True - файлы так и не открывались)
+            cls._dispatcher = None
+        cls._queue = None
+
+    @classmethod
+    def shutdown(cls):
+        """Дописывает записи, оставшиеся в очередях, и останавливает фоновые потоки логирования."""
+        with cls._lock:
+            listeners, cls._listeners = cls._listeners, []
+            cls._listener = cls._worker_queue = None
+        for listener in reversed(listeners):  # Сначала пересылка от воркеров, затем запись в файлы
+            listener.stop()  # stop() дожидается обработки всех записей в очереди
+            for handler in listener.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):  # Поток консоли уже закрыт (например, при выходе из pytest)
+                    pass
+
     def get_main_logger(self) -> logging.Logger:
         if "main" not in self._loggers:
             self._loggers["main"] = self._create_logger("main", "main.log")
@@ -56,4 +182,51 @@ class LoggerManager:
         if name not in self._loggers:
             safe_filename = f"{name}.log".replace(" ", "_").replace(":", "_")
             self._loggers[name] = self._create_logger(name, safe_filename)
-        return self._loggers[name]
\ No newline at end of file
+        return self._loggers[name]
+
+
+class LogSampler:
+    """
+        Прореживание однотипных сообщений в горячих циклах: в лог попадает каждое every-е сообщение
+        (и первое), остальные только считаются. summary() пишет итог по всем вызовам и сбрасывает счётчики.
+    """
+
+    def __init__(self, logger, every=100, level=logging.INFO):
+        self.logger = logger
+        self.every = max(int(every), 1)
+        self.level = level
+        self.total = 0
+        self.logged = 0
+        self.started = time.perf_counter()
+
+    def log(self, msg, *args):
+        self.total += 1
+        if (self.total - 1) % self.every == 0 and self.logger.isEnabledFor(self.level):
+            self.logged += 1
+            self.logger.log(self.level, msg, *args, stacklevel=2)
+
+    def summary(self, message):
+        """Пишет message с числом сообщений, записанных/пропущенных с момента создания или прошлого summary."""
+        if self.total:
+            elapsed = time.perf_counter() - self.started
+            self.logger.log(
+                self.level, f"{message}: {self.total} сообщений, записано {self.logged}, "
+                f"пропущено {self.total - self.logged} за {elapsed:.2f} с", stacklevel=2
+            )
+        self.total = self.logged = 0
+        self.started = time.perf_counter()
+
+
+def memory_usage_mb():
+    """Пиковый объём памяти процесса (RSS) в МБ или None, если платформа не позволяет его узнать."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return round(psutil.Process().memory_info().peak_wset / 1024 / 1024, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
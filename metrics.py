@@ -0,0 +1,267 @@
+import bisect
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loggings import LoggerManager
+
+"""
+    Метрики работы приложения: счётчики, гистограммы задержек и вычисляемые показатели (gauge).
+
+    Запись - несколько арифметических операций под блокировкой метрики, без ввода-вывода. Читать метрики можно
+    из процесса (REGISTRY.snapshot()) или по HTTP в текстовом формате Prometheus (MetricsServer).
+"""
+
+logger = LoggerManager().get_named_logger("news_analyzer")
+
+# Границы корзин гистограмм задержек, сек: от миллисекунд (запросы к БД) до минут (загрузка и полный пересчёт)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счётчик; метки передаются именованными аргументами: inc(outcome="ok")."""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self.collect().items()]
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: хранит число наблюдений по корзинам, сумму и количество."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # метки -> [счётчики по корзинам (+ корзина +Inf), сумма, количество]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Контекстный менеджер: with histogram.time(stage="fetch"): ..."""
+        return _Timer(self, labels)
+
+    def collect(self):
+        """{метки: {'buckets': [(граница, накопленное количество), ...], 'sum': ..., 'count': ...}}"""
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        result = {}
+        for key, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                running += bucket_count
+                cumulative.append((bound, running))
+            result[key] = {'buckets': cumulative, 'sum': total, 'count': count}
+        return result
+
+    def render(self):
+        lines = []
+        for key, series in self.collect().items():
+            for bound, count in series['buckets']:
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Показатель, вычисляемый при чтении: func() возвращает число или, если задан label, {значение метки: число}."""
+
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, func, label=None):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.label = label
+
+    def collect(self):
+        try:
+            value = self.func()
+        except Exception as e:
+            logger.warning(f"Не удалось вычислить метрику {self.name}: {e}")
+            return {}
+        if value is None:
+            return {}
+        if self.label:
+            return {((self.label, label_value),): number for label_value, number in value.items()}
+        return {(): value}
+
+    def render(self):
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self.collect().items()]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Реестр метрик. Повторная регистрация с тем же именем возвращает уже созданную метрику."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def counter(self, name, documentation):
+        return self._register(name, lambda: Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(name, lambda: Histogram(name, documentation, buckets))
+
+    def gauge(self, name, documentation, func, label=None):
+        """Регистрирует (или заменяет - например, для нового экземпляра приложения) вычисляемый показатель."""
+        with self._lock:
+            self._metrics[name] = Gauge(name, documentation, func, label)
+            return self._metrics[name]
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def snapshot(self):
+        """Все метрики как словарь {имя: {метки: значение}}; метки - кортеж пар (имя, значение)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.collect() for metric in metrics}
+
+    def render_prometheus(self):
+        """Текстовый формат Prometheus (exposition format 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(histogram, **labels):
+    """Декоратор: время каждого вызова функции записывается в histogram (в том числе при исключении)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
+
+class MetricsServer:
+    """Локальный HTTP-эндпоинт /metrics в формате Prometheus; работает в фоновом потоке-демоне."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+        content_type = self.CONTENT_TYPE
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Метрики: " + format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]  # Для port=0 - фактически выбранный порт
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Метрики доступны по адресу http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
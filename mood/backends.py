@@ -0,0 +1,130 @@
+import os
+import numpy as np
+
+from loggings import LoggerManager
+
+"""
+    Бэкенды инференса модели настроений на CPU. Все возвращают логиты (batch, 3) как np.ndarray,
+    поэтому SentimentAnalysis не зависит от выбранного бэкенда.
+
+        torch       - исходная fp32-модель PyTorch
+        torch_int8  - динамическая int8-квантизация линейных слоёв (torch.quantization.quantize_dynamic)
+        onnx        - ONNX Runtime; граф экспортируется из PyTorch один раз и кэшируется в ONNX_CACHE_DIR
+"""
+
+logger = LoggerManager().get_named_logger("news_analyzer")
+
+ONNX_CACHE_DIR = os.path.join("models", "onnx")
+
+
+def default_num_threads(num_threads=None):
+    """
+        Число потоков intra-op: заданное явно или по числу ядер, доступных процессу (с учётом привязки
+        sched_setaffinity и cpuset контейнера, как в worker_pool), - одно правило для всех бэкендов.
+    """
+    if num_threads:
+        return num_threads
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name, revision="main", num_threads=None):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        torch.set_num_threads(default_num_threads(num_threads))
+        logger.info(f"Бэкенд {self.name}: потоков intra-op {torch.get_num_threads()}")
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision)
+        model.eval()
+        self.model = self._prepare(model)
+
+    def _prepare(self, model):
+        return model
+
+    def logits(self, input_ids, attention_mask):
+        import torch
+
+        with torch.no_grad():
+            output = self.model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask))
+        return output.logits.numpy()
+
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch_int8"
+
+    def _prepare(self, model):
+        import torch
+
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_name, revision="main", num_threads=None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("Для бэкенда 'onnx' нужен пакет onnxruntime: py -m pip install onnxruntime") from e
+
+        model_path = self.export(model_name, revision)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = default_num_threads(num_threads)
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        logger.info(f"Бэкенд {self.name}: {model_path}, потоков intra-op {options.intra_op_num_threads}")
+
+    @staticmethod
+    def export(model_name, revision="main", cache_dir=ONNX_CACHE_DIR):
+        """Экспортирует модель в ONNX (если ещё нет в кэше) и возвращает путь к файлу."""
+        model_path = os.path.join(cache_dir, f"{model_name.replace('/', '__')}@{revision}.onnx")
+        if os.path.exists(model_path):
+            return model_path
+
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        os.makedirs(cache_dir, exist_ok=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision)
+        model.eval()
+        model.config.return_dict = False  # Кортеж на выходе вместо ModelOutput - проще для трассировки
+
+        dummy = torch.ones((1, 8), dtype=torch.long)
+        tmp_path = model_path + ".tmp"
+        torch.onnx.export(
+            model,
+            (dummy, dummy),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14,
+        )
+        os.replace(tmp_path, model_path)
+        logger.info(f"Модель {model_name} экспортирована в ONNX: {model_path}")
+        return model_path
+
+    def logits(self, input_ids, attention_mask):
+        return self.session.run(["logits"], {
+            "input_ids": input_ids.astype(np.int64, copy=False),
+            "attention_mask": attention_mask.astype(np.int64, copy=False),
+        })[0]
+
+
+BACKENDS = {backend.name: backend for backend in (TorchBackend, TorchInt8Backend, OnnxBackend)}
+
+
+def create_backend(name, model_name, revision="main", num_threads=None):
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд '{name}', доступны: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_name, revision=revision, num_threads=num_threads)
@@ -0,0 +1,121 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+"""
+    Схлопывание одинаковых заголовков перед инференсом.
+
+    Точные дубликаты определяются по нормализованному тексту (регистр, пунктуация, пробелы).
+    Почти-дубликаты (одна новость у разных изданий) - опционально, по MinHash символьных шинглов
+    с LSH-бакетами: кандидаты из общего бакета сравниваются по оценке сходства Жаккара.
+"""
+
+_NON_WORD = re.compile(r"[^\w$%]+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_title(title):
+    """Нормализованный заголовок для сравнения: NFKC, нижний регистр, без пунктуации и лишних пробелов."""
+    title = unicodedata.normalize("NFKC", title or "").lower()
+    return " ".join(_NON_WORD.sub(" ", title).split())
+
+
+def title_key(title):
+    """64-битный ключ нормализованного заголовка (знаковое целое, помещается в INTEGER SQLite)."""
+    digest = hashlib.blake2b(normalize_title(title).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class TitleDeduplicator:
+    """
+        group(titles) возвращает (unique_titles, mapping): mapping[i] - индекс в unique_titles для titles[i].
+        Оценку модели для unique_titles можно раздать обратно исходным заголовкам как probs[mapping].
+    """
+
+    def __init__(self, near_duplicates=False, threshold=0.85, num_perm=64, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold  # Минимальное оценённое сходство Жаккара для почти-дубликатов
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        # a, b < 2^32 при 32-битных x: a*x + b < 2^64, поэтому в uint64 нет переполнения и mod p считается точно
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64, endpoint=True)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64, endpoint=True)
+
+    def group(self, titles):
+        normalized = [normalize_title(title) for title in titles]
+
+        # 1. Точные дубликаты
+        first_by_text = {}
+        exact = []
+        for i, text in enumerate(normalized):
+            exact.append(first_by_text.setdefault(text, i))
+        representatives = sorted(first_by_text.values())
+
+        # 2. Почти-дубликаты среди оставшихся представителей
+        parent = {i: i for i in representatives}
+        if self.near_duplicates and len(representatives) > 1:
+            self._merge_near_duplicates([normalized[i] for i in representatives], representatives, parent)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        unique_index = {}
+        unique_titles = []
+        mapping = []
+        for i in range(len(titles)):
+            root = find(exact[i])
+            if root not in unique_index:
+                unique_index[root] = len(unique_titles)
+                unique_titles.append(titles[root])
+            mapping.append(unique_index[root])
+        return unique_titles, np.asarray(mapping, dtype=np.int64)
+
+    def _merge_near_duplicates(self, texts, indexes, parent):
+        signatures = np.stack([self._signature(text) for text in texts])
+        rows = signatures.shape[1] // self.bands
+
+        buckets = {}
+        for position, signature in enumerate(signatures):
+            for band in range(self.bands):
+                key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                buckets.setdefault(key, []).append(position)
+
+        checked = set()
+        for members in buckets.values():
+            for left in range(len(members)):
+                for right in range(left + 1, len(members)):
+                    pair = (members[left], members[right])
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    similarity = np.mean(signatures[pair[0]] == signatures[pair[1]])
+                    if similarity >= self.threshold:
+                        # Представителем группы остаётся более ранний заголовок
+                        a, b = sorted((self._root(parent, indexes[pair[0]]), self._root(parent, indexes[pair[1]])))
+                        parent[b] = a
+
+    @staticmethod
+    def _root(parent, i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def _signature(self, text):
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # Универсальное хэширование (a*x + b) mod p для num_perm перестановок, минимум по шинглам
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
@@ -1,35 +1,215 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from scipy.special import softmax
-import torch
+import os
+import re
+import threading
+import time
+import numpy as np
+
+from loggings import LoggerManager, memory_usage_mb
+from metrics import REGISTRY
 
 """
-    Hugging Face, Inc. — американская компания, разрабатывающая инструменты для создания приложений с использованием машинного обучения.[3] 
-    Она наиболее известна своей библиотекой Transformers, созданной для приложений обработки естественного языка, и своей платформой, 
+    Hugging Face, Inc. — американская компания, разрабатывающая инструменты для создания приложений с использованием машинного обучения.[3]
+    Она наиболее известна своей библиотекой Transformers, созданной для приложений обработки естественного языка, и своей платформой,
     которая позволяет пользователям обмениваться моделями машинного обучения и наборами данных.
+
+    transformers и torch импортируются только при первой оценке (или warmup), чтобы импорт модуля был дешёвым.
+    Бэкенд инференса (fp32 PyTorch, int8 PyTorch, ONNX Runtime) выбирается параметром backend.
 """
 
+logger = LoggerManager().get_named_logger("news_analyzer")
+
+LABELS = ['negative', 'neutral', 'positive']
+
+INFERENCE_SECONDS = REGISTRY.histogram("sentiment_inference_seconds", "Время оценки одного вызова predict_proba, сек")
+INFERENCE_BATCH_SECONDS = REGISTRY.histogram("sentiment_inference_batch_seconds", "Время прямого прохода модели на один батч, сек")
+INFERENCE_TEXTS = REGISTRY.counter("sentiment_inference_texts_total", "Заголовки, оценённые моделью")
+
+
+def softmax(logits, axis=-1):
+    """Численно устойчивый softmax по оси axis (замена scipy.special.softmax без лишнего импорта)."""
+    shifted = np.exp(logits - np.max(logits, axis=axis, keepdims=True))
+    return shifted / np.sum(shifted, axis=axis, keepdims=True)
+
+
 class SentimentAnalysis:
-    def __init__(self):
-    # Загружаем модель и токенизатор
+    def __init__(self, max_length=512, revision="main", backend="torch", num_threads=None, workers=0):
+        # Модель и токенизатор загружаются лениво, при первом обращении
         self.model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        self.model_revision = revision
+        self.max_length = max_length
+        self.backend_name = backend  # torch, torch_int8 или onnx (см. mood/backends.py)
+        self.num_threads = num_threads  # Потоки intra-op; None - по числу доступных процессу ядер
+        self.workers = workers  # > 1 - оценка в пуле процессов (mood/worker_pool.py), модель в родителе не грузится
+        self.load_seconds = None  # Время загрузки модели, заполняется при загрузке
+
+        self._tokenizer = None
+        self._backend = None
+        self._load_lock = threading.Lock()
+        self._pool = None
+        self._resolved_revision = None
+
+    @property
+    def model_key(self):
+        """
+            Идентификатор модели для кэша оценок в БД: имя + хэш коммита (см. resolved_revision), поэтому
+            обновление весов на Hugging Face сбрасывает кэш. Модель для этого не загружается.
+            Квантизованная модель даёт немного другие вероятности, поэтому кэшируется отдельно;
+            ONNX - тот же fp32-граф и делит кэш с torch.
+        """
+        key = f"{self.model_name}@{self.resolved_revision}"
+        if self.backend_name == "torch_int8":
+            key += "#int8"
+        return key
+
+    @property
+    def resolved_revision(self):
+        """
+            Хэш коммита для ревизии model_revision (ветки или тега), определяется один раз без загрузки весов:
+            запросом метаданных к Hugging Face, а в офлайн-режиме или без сети - по ссылке в локальном кэше.
+            Модель затем грузится именно этой ревизией, поэтому ключ кэша оценок соответствует весам.
+        """
+        if self._resolved_revision is None:
+            self._resolved_revision = self._resolve_revision()
+        return self._resolved_revision
+
+    def _resolve_revision(self):
+        revision = self.model_revision
+        if re.fullmatch(r"[0-9a-f]{40}", revision):
+            return revision
+        try:
+            from huggingface_hub import HfApi, constants
+        except ImportError:
+            return revision
+
+        if not constants.HF_HUB_OFFLINE:
+            try:
+                return HfApi().model_info(self.model_name, revision=revision, timeout=10).sha
+            except Exception as e:
+                logger.warning(f"Не удалось получить хэш ревизии {revision} модели {self.model_name}: {e}")
+
+        ref_path = os.path.join(constants.HF_HUB_CACHE, "models--" + self.model_name.replace("/", "--"), "refs", revision)
+        try:
+            with open(ref_path, encoding="utf-8") as file:
+                return file.read().strip()
+        except OSError:
+            logger.warning(f"Ревизия {revision} модели {self.model_name} не найдена в локальном кэше, ключ кэша оценок - имя ревизии")
+            return revision
+
+    @property
+    def is_loaded(self):
+        return self._backend is not None
+
+    @property
+    def tokenizer(self):
+        self._ensure_loaded()
+        return self._tokenizer
+
+    @property
+    def backend(self):
+        self._ensure_loaded()
+        return self._backend
+
+    def _ensure_loaded(self):
+        if self._backend is not None:
+            return
+        with self._load_lock:
+            if self._backend is not None:
+                return
+            started = time.perf_counter()
+            from transformers import AutoTokenizer
+            from mood.backends import create_backend
+
+            revision = self.resolved_revision
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, revision=revision)
+            self._backend = create_backend(self.backend_name, self.model_name, revision=revision, num_threads=self.num_threads)
+            self.load_seconds = time.perf_counter() - started
+            logger.info(f"Модель {self.model_key} ({self.backend_name}) загружена за {self.load_seconds:.2f} с, память процесса: {memory_usage_mb()} МБ")
+
+    @property
+    def pool(self):
+        """Пул процессов-воркеров (создаётся при первом обращении, только если workers > 1)."""
+        if self._pool is None:
+            with self._load_lock:
+                if self._pool is None:
+                    from mood.worker_pool import SentimentWorkerPool
+
+                    self._pool = SentimentWorkerPool(self.workers, model_kwargs={
+                        'max_length': self.max_length,
+                        'revision': self.resolved_revision,
+                        'backend': self.backend_name,
+                    })
+        return self._pool
+
+    def warmup(self, text="Bitcoin price is stable today"):
+        """Загружает модель и прогоняет один пример, чтобы первая реальная оценка не платила за инициализацию."""
+        started = time.perf_counter()
+        if self.workers > 1:
+            self.pool.warmup()
+        else:
+            self.predict_proba([text])
+        return time.perf_counter() - started
+
+    def close(self):
+        """Останавливает пул воркеров, если он был запущен."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
 
     # Функция для анализа настроения
     def analyze_sentiment(self, text):
-        encoded_input = self.tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-        with torch.no_grad():
-            output = self.model(**encoded_input)
+        probs = self.predict_proba([text])[0]
+        return {label: float(prob) for label, prob in zip(LABELS, probs)}
+
+    def predict_proba(self, texts, batch_size=32):
+        """
+            Пакетная оценка: возвращает матрицу вероятностей (len(texts), 3) в порядке LABELS.
+
+            Тексты токенизируются один раз без паддинга, сортируются по длине и режутся на батчи,
+            поэтому каждый батч паддится только до своей самой длинной строки.
+        """
+        texts = list(texts)
+        probs = np.empty((len(texts), len(LABELS)), dtype=np.float32)
+        if not texts:
+            return probs
+        INFERENCE_TEXTS.inc(len(texts))
+        if self.workers > 1:
+            with INFERENCE_SECONDS.time(mode="pool"):
+                return self.pool.predict_proba(texts, batch_size=batch_size)
+
+        started = time.perf_counter()
 
-        scores = output.logits[0].numpy()
-        probs = softmax(scores)
+        tokenizer, backend = self.tokenizer, self.backend
+        encoded = tokenizer(texts, truncation=True, max_length=self.max_length)
+        input_ids = encoded['input_ids']
+        attention_mask = encoded['attention_mask']
+        order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
 
-        labels = ['negative', 'neutral', 'positive']
-        return {label: float(prob) for label, prob in zip(labels, probs)}
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            batch = tokenizer.pad(
+                {
+                    'input_ids': [input_ids[i] for i in batch_idx],
+                    'attention_mask': [attention_mask[i] for i in batch_idx],
+                },
+                padding='longest',
+                return_tensors='np'
+            )
+            with INFERENCE_BATCH_SECONDS.time(backend=self.backend_name):
+                logits = backend.logits(batch['input_ids'], batch['attention_mask'])
+            probs[batch_idx] = softmax(logits, axis=1)
+
+        INFERENCE_SECONDS.observe(time.perf_counter() - started, mode="local")
+        return probs
+
+    def analyze_batch(self, texts, batch_size=32):
+        """Пакетный аналог analyze_sentiment: список словарей {'negative', 'neutral', 'positive'} в исходном порядке."""
+        probs = self.predict_proba(texts, batch_size=batch_size)
+        return [{label: float(prob) for label, prob in zip(LABELS, row)} for row in probs]
 
 if __name__ == "__main__":
     # Пример
     text = "Bitcoin is looking strong today, might break $70k soon!"
     sentiment = SentimentAnalysis()
-    
-    print(sentiment.analyze_sentiment(text))
\ No newline at end of file
+
+    print(sentiment.analyze_sentiment(text))
+    print(sentiment.analyze_batch([text, "Exchange hacked, funds lost", "ETH price unchanged"]))
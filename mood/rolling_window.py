@@ -0,0 +1,134 @@
+import numpy as np
+
+from mood.mood import LABELS
+
+
+class RollingSentimentWindow:
+    """
+        Скользящее окно оценок настроения одной монеты.
+
+        Записи (timestamp, probs) хранятся в кольцевом буфере numpy, упорядоченном по времени,
+        а суммы и счётчики для средних поддерживаются инкрементально: добавление новой записи и удаление
+        устаревшей стоят O(1), результаты читаются без повторного прохода по истории.
+        Запись с временем раньше последней (догрузка старых новостей) вставляется на своё место сдвигом буфера.
+    """
+
+    def __init__(self, window_seconds=12 * 3600, strong_threshold=0.7, capacity=256):
+        self.window_seconds = window_seconds
+        self.strong_threshold = strong_threshold  # Порог "уверенного" настроения
+
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._probs = np.empty((capacity, len(LABELS)), dtype=np.float64)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._head = 0  # Индекс самой старой записи
+        self._size = 0
+        self._known_ids = set()
+
+        self._sum_all = np.zeros(len(LABELS), dtype=np.float64)
+        self._sum_strong = np.zeros(len(LABELS), dtype=np.float64)
+        self._counts = np.zeros(len(LABELS) + 1, dtype=np.int64)  # negative, neutral, positive, undefined
+
+    def __len__(self):
+        return self._size
+
+    def add(self, timestamp, probs, item_id=None):
+        """Добавляет оценку; повтор item_id игнорируется. Возвращает True, если запись добавлена."""
+        if item_id is not None:
+            if item_id in self._known_ids:
+                return False
+            self._known_ids.add(item_id)
+        if self._size == len(self._timestamps):
+            self._grow()
+
+        probs = np.asarray(probs, dtype=np.float64)
+        capacity = len(self._timestamps)
+        tail = (self._head + self._size) % capacity
+        if self._size and timestamp < self._timestamps[(tail - 1) % capacity]:
+            position = self._insert_position(timestamp)
+            self._shift_right(position)
+            slot = (self._head + position) % capacity
+        else:
+            slot = tail
+
+        self._timestamps[slot] = timestamp
+        self._probs[slot] = probs
+        self._ids[slot] = -1 if item_id is None else item_id
+        self._size += 1
+        self._account(probs, 1)
+        return True
+
+    def expire(self, now):
+        """Удаляет записи старше now - window_seconds; возвращает количество удалённых."""
+        cutoff = now - self.window_seconds
+        capacity = len(self._timestamps)
+        expired = 0
+        while self._size and self._timestamps[self._head] < cutoff:
+            self._account(self._probs[self._head], -1)
+            self._known_ids.discard(int(self._ids[self._head]))
+            self._head = (self._head + 1) % capacity
+            self._size -= 1
+            expired += 1
+        if not self._size:
+            # Пустое окно - сбрасываем суммы, чтобы не копить погрешность вычитаний
+            self._sum_all[:] = 0
+            self._sum_strong[:] = 0
+            self._counts[:] = 0
+        return expired
+
+    def average_all(self):
+        """Среднее настроение по всем новостям окна или None, если окно пусто."""
+        if not self._size:
+            return None
+        return self._as_dict(self._sum_all / self._size)
+
+    def average_strong(self):
+        """Среднее по новостям с максимальной вероятностью > strong_threshold или None, если таких нет."""
+        strong = int(self._counts[:len(LABELS)].sum())
+        if not strong:
+            return None
+        return self._as_dict(self._sum_strong / strong)
+
+    def count_stats(self):
+        """Количество уверенных оценок по категориям и неопределённых ('undefined')."""
+        return dict(zip(LABELS + ['undefined'], map(int, self._counts)))
+
+    def _account(self, probs, sign):
+        self._sum_all += sign * probs
+        max_index = int(np.argmax(probs))
+        if probs[max_index] > self.strong_threshold:
+            self._sum_strong += sign * probs
+            self._counts[max_index] += sign
+        else:
+            self._counts[-1] += sign
+
+    def _insert_position(self, timestamp):
+        """Логическая позиция (от head) для вставки с сохранением порядка по времени."""
+        capacity = len(self._timestamps)
+        logical = (self._head + np.arange(self._size)) % capacity
+        return int(np.searchsorted(self._timestamps[logical], timestamp, side='right'))
+
+    def _shift_right(self, position):
+        """Сдвигает записи с логической позиции position на одну вправо (место под вставку)."""
+        capacity = len(self._timestamps)
+        for logical in range(self._size, position, -1):
+            dst = (self._head + logical) % capacity
+            src = (self._head + logical - 1) % capacity
+            self._timestamps[dst] = self._timestamps[src]
+            self._probs[dst] = self._probs[src]
+            self._ids[dst] = self._ids[src]
+
+    def _grow(self):
+        """Удваивает буфер, раскладывая записи по порядку с нуля."""
+        capacity = len(self._timestamps)
+        logical = (self._head + np.arange(self._size)) % capacity
+        new_capacity = max(2 * capacity, 1)
+        for name in ('_timestamps', '_probs', '_ids'):
+            old = getattr(self, name)
+            new = np.empty((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[logical]
+            setattr(self, name, new)
+        self._head = 0
+
+    @staticmethod
+    def _as_dict(values):
+        return {label: round(float(value), 3) for label, value in zip(LABELS, values)}
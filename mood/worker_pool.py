@@ -0,0 +1,121 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from loggings import LoggerManager
+
+"""
+    Пул процессов для оценки больших объёмов заголовков на нескольких ядрах.
+
+    Каждый воркер один раз загружает модель и закрепляется за своей долей ядер (sched_setaffinity, где доступно),
+    число потоков intra-op равно размеру этой доли. Родитель отправляет воркерам списки текстов
+    и получает обратно массивы вероятностей целиком - без словаря на каждый заголовок.
+"""
+
+logger = LoggerManager().get_named_logger("news_analyzer")
+
+_worker_model = None  # Модель внутри процесса-воркера
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _split_cpus(workers):
+    """Делит доступные ядра на workers непересекающихся групп (если ядер меньше - группы по одному ядру по кругу)."""
+    cpus = _available_cpus()
+    if len(cpus) < workers:
+        return [[cpus[i % len(cpus)]] for i in range(workers)]
+    return [list(group) for group in np.array_split(cpus, workers)]
+
+
+def _init_worker(model_factory, model_kwargs, cpu_groups, counter, log_queue):
+    global _worker_model
+    LoggerManager.use_parent_queue(log_queue)  # Файлы логов пишет и ротирует только родительский процесс
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    cpus = [int(cpu) for cpu in cpu_groups[index % len(cpu_groups)]]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    _worker_model = model_factory(num_threads=len(cpus), **model_kwargs)
+    _worker_model.warmup()
+
+
+def _predict_chunk(texts, batch_size):
+    return np.asarray(_worker_model.predict_proba(texts, batch_size=batch_size), dtype=np.float32)
+
+
+class SentimentWorkerPool:
+    """
+        Пул процессов с моделью настроений. predict_proba сохраняет порядок входных текстов;
+        при падении воркера пул пересоздаётся, а незавершённые части отправляются повторно (до max_retries раз).
+    """
+
+    def __init__(self, workers, model_factory=None, model_kwargs=None, max_retries=1):
+        if model_factory is None:
+            from mood.mood import SentimentAnalysis
+            model_factory = SentimentAnalysis
+        self.workers = workers
+        self.model_factory = model_factory
+        self.model_kwargs = dict(model_kwargs or {})
+        self.max_retries = max_retries
+        self._context = multiprocessing.get_context("spawn")  # fork небезопасен с потоками torch
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            cpu_groups = _split_cpus(self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self.model_factory, self.model_kwargs, cpu_groups, self._context.Value("i", 0),
+                          LoggerManager.worker_log_queue(self._context)),
+            )
+            logger.info(f"Запущен пул инференса: {self.workers} процессов, ядра {cpu_groups}")
+        return self._executor
+
+    def warmup(self):
+        """Запускает воркеры и дожидается загрузки модели в каждом."""
+        executor = self._get_executor()
+        list(executor.map(_predict_chunk, [["warmup"]] * self.workers, [1] * self.workers))
+
+    def predict_proba(self, texts, batch_size=32, chunk_size=None):
+        """Матрица вероятностей (len(texts), 3); тексты делятся на части по chunk_size и раздаются воркерам."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 3), dtype=np.float32)
+        # По умолчанию - несколько частей на воркер, чтобы ядра не простаивали в конце
+        chunk_size = chunk_size or max(batch_size, -(-len(texts) // (self.workers * 4)))
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        results = [None] * len(chunks)
+
+        for attempt in range(self.max_retries + 1):
+            pending = [i for i, result in enumerate(results) if result is None]
+            executor = self._get_executor()
+            futures = {i: executor.submit(_predict_chunk, chunks[i], batch_size) for i in pending}
+            try:
+                for i, future in futures.items():
+                    results[i] = future.result()
+                return np.concatenate(results)
+            except BrokenProcessPool as e:
+                logger.error(f"Воркер пула инференса упал ({e}), попытка {attempt + 1} из {self.max_retries + 1}")
+                self._shutdown_executor()
+        raise RuntimeError("Пул инференса не смог обработать тексты: воркеры падают повторно")
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,56 @@
+import re
+
+
+class CoinMatcher:
+    """
+        Предкомпилированный поиск монет по ключевым словам.
+
+        Текст разбивается на слова одним проходом регулярного выражения, каждое слово ищется в словаре
+        ключевых слов, поэтому стоимость не зависит от количества монет. Ключевое слово засчитывается
+        только целиком: "sol" не найдётся в "solution", "eth" - в "method".
+        Пары вида "btc/usd" проверяются и целиком, и по частям.
+        Словоформы не распознаются: "bitcoins" не совпадёт с "bitcoin" - нужные формы добавляются в ключевые слова.
+    """
+
+    # Слово - буквы и цифры, допускаются пары через "/"
+    _TOKEN = re.compile(r"[^\W_]+(?:/[^\W_]+)*")
+
+    def __init__(self, coin_keywords):
+        self.coin_by_keyword = {}  # Ключевые слова, которые являются одним токеном
+        phrases = {}  # Остальные (с пробелами, дефисами и т.п.) - через отдельное регулярное выражение
+        for coin, keywords in coin_keywords.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if self._TOKEN.fullmatch(keyword):
+                    self.coin_by_keyword[keyword] = coin
+                else:
+                    phrases[keyword] = coin
+
+        self.coin_by_phrase = phrases
+        self.phrase_pattern = None
+        if phrases:
+            alternation = "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+            self.phrase_pattern = re.compile(rf"(?<![^\W_])(?:{alternation})(?![^\W_])")
+
+    def find(self, text):
+        """Множество монет, ключевые слова которых встречаются в тексте."""
+        if not text:
+            return set()
+        text = text.lower()
+        coin_by_keyword = self.coin_by_keyword
+
+        coins = set()
+        for token in self._TOKEN.findall(text):
+            coin = coin_by_keyword.get(token)
+            if coin is not None:
+                coins.add(coin)
+            if "/" in token:
+                coins.update(coin_by_keyword[part] for part in token.split("/") if part in coin_by_keyword)
+
+        if self.phrase_pattern is not None:
+            coins.update(self.coin_by_phrase[match] for match in self.phrase_pattern.findall(text))
+        return coins
+
+    def find_batch(self, texts):
+        """Пакетный вариант find: список множеств монет в порядке входных текстов."""
+        return [self.find(text) for text in texts]
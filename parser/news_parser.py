@@ -1,12 +1,24 @@
+import logging
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from parser.config import CryptoPanic_API_KEY, CryptoPanic_url
-from db_sentiment_app import MainDatabase
-from loggings import LoggerManager
+from parser.coin_matcher import CoinMatcher
+from db_sentiment_app import MainDatabase, to_utc_string
+from loggings import LoggerManager, LogSampler
+from metrics import REGISTRY
 
 logger = LoggerManager().get_named_logger("news_analyzer")
 
+FETCH_SECONDS = REGISTRY.histogram("cryptopanic_fetch_seconds", "Время загрузки новых постов CryptoPanic (все страницы), сек")
+FETCHES = REGISTRY.counter("cryptopanic_fetches_total", "Загрузки CryptoPanic по результату: ok, not_modified, error")
+FETCHED_PAGES = REGISTRY.counter("cryptopanic_pages_total", "Запрошенные страницы API CryptoPanic")
+FETCHED_POSTS = REGISTRY.counter("cryptopanic_posts_total", "Новые посты, полученные от CryptoPanic")
+
 COIN_KEYWORDS = {
     "Bitcoin": ["bitcoin", "btc", "btc/usd", "btcusdt"],
     "Ethereum": ["ethereum", "eth", "eth/usd", "ethusdt"],
@@ -17,29 +29,166 @@ COIN_KEYWORDS = {
 }
 
 class CryptoPanicParser:
-    def __init__(self):
+    SOURCE = "cryptopanic"  # Ключ состояния загрузки в таблице fetch_state
+    MAX_PAGES = 20  # Предел страниц за один запуск (догрузка после простоя)
+    TIMEOUT = (5, 30)  # Таймауты соединения и чтения, сек
+
+    def __init__(self, data_base=None):
         self.api_key = CryptoPanic_API_KEY
         self.base_url = "https://cryptopanic.com/api/v1/posts/"
 
-        self.data_base = MainDatabase()
+        self.data_base = data_base or MainDatabase()
+        self.coin_matcher = CoinMatcher(COIN_KEYWORDS)
+        self.coin_log = LogSampler(logger, every=100, level=logging.DEBUG)  # Поиск монет вызывается на каждый пост
+        self.session = self._create_session()
+
+    def _create_session(self):
+        """Одна сессия на всё время работы: keep-alive соединения и повторы с экспоненциальной задержкой."""
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def fetch_news(self, public=True, limit=50):
+        """Новые посты CryptoPanic (от новых к старым), см. fetch_new_posts."""
+        posts, _ = self.fetch_new_posts(public=public, limit=limit)
+        return posts
+
+    def fetch_new_posts(self, public=True, limit=50):
+        """
+            Загружает посты новее сохранённой отметки (last_published_at, last_post_id), проходя по страницам next.
+
+            За один запуск запрашивается не больше MAX_PAGES страниц. Если после простоя новых постов больше,
+            следующая страница и нижняя граница пропуска сохраняются в состоянии (resume_*), и следующие запуски
+            сначала забирают свежие посты, а оставшиеся страницы - догружают пропуск, пока он не закроется.
+
+            Возвращает (posts, state): state - новое состояние для save_fetch_state или None, если загрузка
+            прервалась и отметку двигать нельзя (иначе пропущенные страницы будут потеряны).
+        """
+        started = time.perf_counter()
+        state = self.data_base.get_fetch_state(self.SOURCE)
+        high_water = self._post_key(state['last_published_at'], state['last_post_id'])
+        resume_key = self._post_key(state['resume_published_at'], state['resume_post_id'])
+        resume_url = state['resume_url'] if resume_key else None
+        # Без отметки (первый запуск) берём только первую страницу, а не всю историю
+        max_pages = self.MAX_PAGES if high_water else 1
+
         params = {
             "auth_token": self.api_key,
             "public": str(public).lower(),
             "limit": limit
         }
-        
+        headers = {}
+        if state['etag']:
+            headers["If-None-Match"] = state['etag']
+        if state['last_modified']:
+            headers["If-Modified-Since"] = state['last_modified']
+
+        posts = []
+        new_state = {}
         try:
-            logger.debug(f"Отправка запроса в CryptoPanic с параметрами: {params}")
-            response = requests.get(self.base_url, params=params)
+            # 1. Свежие посты: от первой страницы до отметки
+            gap_url, pages, response = self._fetch_pages(posts, self.base_url, params, headers, high_water, max_pages)
+            if response.status_code == 304:
+                logger.info("CryptoPanic: новых новостей нет (304 Not Modified)")
+            else:
+                new_state = {
+                    'etag': response.headers.get("ETag"),
+                    'last_modified': response.headers.get("Last-Modified"),
+                }
+
+            if gap_url and high_water:
+                # Предел страниц: между самым старым полученным постом и отметкой остался пропуск.
+                # Если пропуск уже догружался, его нижняя граница сохраняется - новый проход дойдёт и до неё
+                logger.warning(
+                    f"Достигнут предел {max_pages} страниц CryptoPanic, оставшиеся новости будут догружены в следующих запусках"
+                )
+                lower_key = resume_key if resume_url else high_water
+                new_state.update(self._resume_state(gap_url, lower_key))
+            elif resume_url:
+                # 2. Догрузка пропуска, оставшегося от прошлых запусков, в пределах оставшихся страниц
+                fresh = len(posts)
+                next_url, _, _ = self._fetch_pages(
+                    posts, resume_url, {"auth_token": self.api_key}, {}, resume_key, max_pages - pages
+                )
+                logger.info(f"Догрузка пропуска CryptoPanic: получено {len(posts) - fresh} постов")
+                new_state.update(self._resume_state(next_url, resume_key))  # Пропуск закрыт - продолжение сбрасывается
+        except (requests.RequestException, ValueError) as e:
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            logger.error(f"Ошибка запроса к CryptoPanic: Статус-код {status_code}; {e}")
+            self._observe_fetch(started, "error", posts)
+            return posts, None
+
+        if posts:
+            newest = max(posts, key=lambda post: self._post_key(post.get("published_at"), post.get("id")))
+            newest_key = self._post_key(newest.get("published_at"), newest.get("id"))
+            if not high_water or newest_key > high_water:
+                new_state['last_published_at'], new_state['last_post_id'] = newest_key
+        logger.info(f"Получено {len(posts)} новых новостей от CryptoPanic")
+        self._observe_fetch(started, "not_modified" if response.status_code == 304 and not posts else "ok", posts)
+        return posts, new_state
+
+    def _fetch_pages(self, posts, url, params, headers, stop_key, max_pages):
+        """
+            Проходит по страницам начиная с url и добавляет посты в posts, пока не встретится пост не новее stop_key,
+            не кончатся страницы или не будет запрошено max_pages страниц. Возвращает (next_url, pages, first_response):
+            next_url - следующая страница, если остановились по пределу страниц, иначе None.
+        """
+        first_response = None
+        for page in range(max_pages):
+            logger.debug(f"Запрос страницы {page + 1} CryptoPanic: {url}")
+            FETCHED_PAGES.inc()
+            response = self.session.get(url, params=params, headers=headers, timeout=self.TIMEOUT)
+            if first_response is None:
+                first_response = response
+            if response.status_code == 304:
+                return None, page + 1, first_response
             response.raise_for_status()
-            results = response.json().get("results", [])
-            logger.info(f"Получено {len(results)} новостей от CryptoPanic")
-            return results
-        except requests.RequestException as e:
-            logger.error(f"Ошибка запроса к CryptoPanic: Статус-код {response.status_code}; {e}")
-            return []
+
+            data = response.json()
+            for post in data.get("results", []):
+                if stop_key and self._post_key(post.get("published_at"), post.get("id")) <= stop_key:
+                    return None, page + 1, first_response
+                posts.append(post)
+
+            next_url = data.get("next")
+            if not next_url:
+                return None, page + 1, first_response
+            # Ссылка next уже содержит все параметры запроса; условные заголовки нужны только первой странице
+            url, params, headers = next_url, None, {}
+        return url, max_pages, first_response
+
+    @staticmethod
+    def _resume_state(url, lower_key):
+        """Поля состояния для продолжения догрузки; ключ API из ссылки не сохраняется в БД."""
+        if url is None:
+            return {'resume_url': None, 'resume_published_at': None, 'resume_post_id': None}
+        parts = urlsplit(url)
+        query = urlencode([(key, value) for key, value in parse_qsl(parts.query) if key != "auth_token"])
+        published_at, post_id = lower_key
+        return {'resume_url': urlunsplit(parts._replace(query=query)), 'resume_published_at': published_at, 'resume_post_id': post_id}
+
+    @staticmethod
+    def _observe_fetch(started, outcome, posts):
+        FETCH_SECONDS.observe(time.perf_counter() - started)
+        FETCHES.inc(outcome=outcome)
+        FETCHED_POSTS.inc(len(posts))
+
+    @staticmethod
+    def _post_key(published_at, post_id):
+        """Ключ упорядочивания постов: (время публикации в UTC, id)."""
+        published_utc = to_utc_string(published_at) if published_at else None
+        if published_utc is None:
+            return None
+        return (published_utc, post_id or 0)
 
     def extract_coin(self, text, currencies=None):
         coins_found = set()
@@ -48,27 +197,44 @@ class CryptoPanicParser:
         if currencies:
             coin_titles = [c.get("title", "").strip() for c in currencies if c.get("title")]
             if coin_titles:
-                logger.debug(f"Монеты найдены по тегам: {coin_titles}")
+                self.coin_log.log("Монеты найдены по тегам: %s", coin_titles)
                 coins_found.update(coin_titles)
 
-        # 2. Поиск по ключевым словам в тексте
-        text = text.lower()
-        for coin, keywords in COIN_KEYWORDS.items():
-            if any(keyword in text for keyword in keywords):
-                logger.debug(f"Монета '{coin}' найдена по ключевым словам в тексте")
-                coins_found.add(coin)
+        # 2. Поиск по ключевым словам в тексте (один проход предкомпилированным шаблоном)
+        coins_in_text = self.coin_matcher.find(text)
+        if coins_in_text:
+            self.coin_log.log("Монеты %s найдены по ключевым словам в тексте", coins_in_text)
+            coins_found.update(coins_in_text)
 
         # 3. Если ничего не найдено
         if not coins_found:
-            logger.debug("Монета не найдена")
+            self.coin_log.log("Монета не найдена: %s", text)
             return ["Unknown"]
 
         return sorted(coins_found)  # или list(coins_found), если порядок не важен
 
+    def extract_coins_batch(self, posts):
+        """Пакетный вариант extract_coin для списка постов CryptoPanic: список монет на каждый пост."""
+        texts = [post.get("title", "") + " " + post.get("summary", "") for post in posts]
+        coins_in_texts = self.coin_matcher.find_batch(texts)
+
+        results = []
+        for post, coins_found in zip(posts, coins_in_texts):
+            coins_found.update(c.get("title", "").strip() for c in post.get("currencies") or [] if c.get("title"))
+            results.append(sorted(coins_found) if coins_found else ["Unknown"])
+        return results
+
     def run(self):
+        """Загружает и сохраняет новые новости; возвращает id добавленных в БД записей."""
         logger.info("Запуск парсера CryptoPanic...")
-        news = self.fetch_news()
+        news, state = self.fetch_new_posts()
         logger.debug(f"Начало сохранения {len(news)} новостей в БД")
-        self.data_base.cryptopanic_save_news(news, self.extract_coin)
+        inserted_ids = self.data_base.cryptopanic_save_news(news, self.extract_coin)
+        self.coin_log.summary("Поиск монет в новостях")
+        # Отметка двигается только если выборка полная и все её посты действительно есть в БД
+        urls = {post.get("url", "") for post in news}
+        if state and len(self.data_base.get_known_urls(urls)) == len(urls):
+            self.data_base.save_fetch_state(self.SOURCE, **state)
         logger.info("Парсинг и сохранение новостей завершены")
+        return inserted_ids
 
@@ -0,0 +1,211 @@
+"""
+    Офлайн-прогон архивных ответов CryptoPanic: восстановление истории без обращения к сети.
+
+    Файлы .json / .jsonl (в том числе .gz) читаются потоково, посты проходят тот же путь, что и живые:
+    поиск монет (extract_coin) -> пакетная запись в БД -> пакетная оценка (кэш, дедупликация) ->
+    скользящие окна по монетам. Результаты окон сохраняются в sentiment_history на каждый шаг
+    исторического времени (--step-minutes), как если бы приложение работало в тот момент.
+
+    Архив ожидается примерно в хронологическом порядке (файлы сортируются по имени, посты внутри
+    пачки - по времени). Посты старше уже сохранённого шага записываются и оцениваются, но на прошлые
+    шаги не влияют.
+
+    Запуск:
+        py replay.py archive/ --db replay.db --step-minutes 30 --chunk-size 5000
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+from db_sentiment_app import to_utc_string
+from loggings import LoggerManager, memory_usage_mb
+from sentiment_app import MainApp, utc_timestamp
+
+try:
+    import ijson  # Потоковый разбор .json без загрузки целиком (есть в requirements.txt)
+except ImportError:
+    ijson = None
+
+logger = LoggerManager().get_named_logger("news_analyzer_replay")
+
+ARCHIVE_SUFFIXES = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+MAX_JSON_WITHOUT_IJSON_MB = 32  # Без ijson файл .json читается целиком; большие файлы так не обрабатываются
+
+
+def iter_archive_files(paths):
+    """Файлы архива по списку путей (каталоги обходятся рекурсивно), отсортированные по имени."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(ARCHIVE_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _posts_from_document(document):
+    """Пост или ответ API ({"results": [...]}) -> посты."""
+    if isinstance(document, dict) and "results" in document:
+        yield from document["results"] or []
+    elif isinstance(document, list):
+        yield from document
+    elif isinstance(document, dict):
+        yield document
+
+
+def iter_archived_posts(paths):
+    """Генератор постов из архивных файлов; в памяти одновременно не больше одной строки JSONL / одного поста."""
+    for path in iter_archive_files(paths):
+        with _open(path) as file:
+            if path.endswith((".jsonl", ".jsonl.gz")):
+                for line in file:
+                    if line.strip():
+                        yield from _posts_from_document(json.loads(line))
+            elif ijson is not None:
+                # Ответ API - объект с results; иначе файл - массив постов
+                first = file.read(1)
+                while first.isspace():
+                    first = file.read(1)
+                file.seek(0)
+                yield from ijson.items(file, "results.item" if first == b"{" else "item")
+            else:
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                if size_mb > MAX_JSON_WITHOUT_IJSON_MB:
+                    raise RuntimeError(
+                        f"{path}: {size_mb:.0f} МБ - без пакета ijson файл .json пришлось бы загрузить в память целиком. "
+                        f"Установите ijson (pip install ijson) или перепакуйте архив в .jsonl"
+                    )
+                yield from _posts_from_document(json.load(file))
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _post_time(post):
+    return to_utc_string(post.get("published_at") or "") or ""
+
+
+class Replay:
+    """Прогон архива через конвейер MainApp с сохранением результатов окон на каждом историческом шаге."""
+
+    def __init__(self, app, step_seconds=1800):
+        self.app = app
+        self.step_seconds = step_seconds
+        self.next_step = None  # Следующий исторический момент, на который сохраняется снимок окон
+        self.stats = {'posts': 0, 'inserted': 0, 'scored': 0, 'forward_passes': 0, 'snapshots': 0}
+
+    def run(self, paths, chunk_size=5000):
+        started = time.perf_counter()
+        for chunk in chunked(iter_archived_posts(paths), chunk_size):
+            self.process_chunk(chunk)
+            elapsed = time.perf_counter() - started
+            historical = time.strftime('%Y-%m-%d %H:%M', time.gmtime(self.next_step)) if self.next_step else "-"
+            logger.info(
+                f"Прогон: постов {self.stats['posts']} ({self.stats['posts'] / elapsed:.0f}/с), "
+                f"новых в БД {self.stats['inserted']}, прогонов модели {self.stats['forward_passes']}, "
+                f"снимков {self.stats['snapshots']}, историческое время {historical} UTC, память {memory_usage_mb()} МБ"
+            )
+        self.flush()
+        self.stats['seconds'] = round(time.perf_counter() - started, 2)
+        logger.info(f"Прогон архива завершён: {self.stats}")
+        return self.stats
+
+    def process_chunk(self, posts):
+        app = self.app
+        data_base = app.data_base
+        posts = sorted(posts, key=_post_time, reverse=True)  # cryptopanic_save_news ждёт новые первыми
+        inserted_ids = data_base.cryptopanic_save_news(posts, app.parser.extract_coin)
+
+        # В окна идут все посты пачки, в том числе уже сохранённые прошлым прогоном
+        news_ids = data_base.get_news_ids_by_urls(post.get("url", "") for post in posts)
+        grouped_news = data_base.get_news_by_ids(news_ids)
+        scores = app.score_news(grouped_news)
+
+        entries = sorted(
+            (ts, news_id, currency)
+            for currency, news_items in grouped_news.items()
+            for news_id, title, currency_tags, published_at in news_items
+            if (ts := utc_timestamp(published_at)) is not None  # Время без разбора в БД хранится как NULL
+        )
+        for ts, news_id, currency in entries:
+            self._emit_until(ts)
+            app.windows[currency].add(ts, scores[news_id], item_id=news_id)
+
+        self.stats['posts'] += len(posts)
+        self.stats['inserted'] += len(inserted_ids)
+        self.stats['scored'] += len(scores)
+        self.stats['forward_passes'] += app.last_pass_stats.get('forward_passes', 0)
+
+    def _emit_until(self, ts):
+        """Сохраняет снимки окон на все шаги, наступившие до момента ts."""
+        if self.next_step is None:
+            self.next_step = (int(ts) // self.step_seconds + 1) * self.step_seconds
+        while self.next_step <= ts:
+            self._save_snapshot(self.next_step)
+            self.next_step += self.step_seconds
+
+    def flush(self):
+        """Снимок на последний шаг после окончания архива."""
+        if self.next_step is not None:
+            self._save_snapshot(self.next_step)
+
+    def _save_snapshot(self, ts):
+        windows = self.app.windows
+        for window in windows.values():
+            window.expire(ts)
+        self.app.data_base.save_sentiment_snapshot(ts, {
+            currency: (window.average_all(), window.average_strong(), window.count_stats())
+            for currency, window in windows.items()
+        })
+        self.stats['snapshots'] += 1
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Офлайн-прогон архивных ответов CryptoPanic")
+    arg_parser.add_argument("paths", nargs="+", help="Файлы .json/.jsonl(.gz) или каталоги с ними")
+    arg_parser.add_argument("--db", default="cryptonews.db", help="Файл SQLite для результатов")
+    arg_parser.add_argument("--chunk-size", type=int, default=5000, help="Постов в одной пачке")
+    arg_parser.add_argument("--step-minutes", type=int, default=30, help="Шаг исторического времени для снимков")
+    arg_parser.add_argument("--window-hours", type=int, default=12)
+    arg_parser.add_argument("--batch-size", type=int, default=32)
+    arg_parser.add_argument("--backend", default="torch", help="torch, torch_int8 или onnx")
+    arg_parser.add_argument("--workers", type=int, default=0, help="Процессов для инференса (0 - в текущем процессе)")
+    arg_parser.add_argument("--near-duplicates", action="store_true", help="Схлопывать почти одинаковые заголовки")
+    args = arg_parser.parse_args()
+
+    app = MainApp(
+        batch_size=args.batch_size,
+        window_hours=args.window_hours,
+        sentiment_backend=args.backend,
+        inference_workers=args.workers,
+        near_duplicates=args.near_duplicates,
+        db_path=args.db,
+    )
+    try:
+        Replay(app, step_seconds=args.step_minutes * 60).run(args.paths, chunk_size=args.chunk_size)
+    finally:
+        app.sentiment_analysis.close()
+        app.data_base.close()
+        LoggerManager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,70 @@
 import time
+_IMPORT_STARTED = time.perf_counter()  # Для отчёта о времени запуска
+
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
 from apscheduler.schedulers.background import BackgroundScheduler
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from scipy.special import softmax
-from collections import defaultdict
-import numpy as np
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
 
 from parser.news_parser import CryptoPanicParser
-from mood.mood import SentimentAnalysis
+from mood.mood import SentimentAnalysis, LABELS
+from mood.rolling_window import RollingSentimentWindow
+from mood.dedup import TitleDeduplicator, title_key
 from db_sentiment_app import MainDatabase
-from loggings import LoggerManager
+from parser.config import COIN_KEYWORDS
+from loggings import LoggerManager, LogSampler, memory_usage_mb
+from metrics import REGISTRY, MetricsServer, timed
 
 logger = LoggerManager().get_named_logger("news_analyzer")
 logger_res = LoggerManager().get_named_logger("news_analyzer_results")
 
+PIPELINE_SECONDS = REGISTRY.histogram("pipeline_stage_seconds", "Время этапов конвейера (с ожиданием pipeline_lock), сек")
+HEADLINES_SCORED = REGISTRY.counter("sentiment_headlines_total", "Новости к оценке по источнику оценки: cache, duplicate, model")
+SCHEDULER_EVENTS = REGISTRY.counter(
+    "scheduler_job_events_total", "Сбои заданий планировщика: missed (пропущен запуск), max_instances (предыдущий ещё идёт), error"
+)
+JOB_EVENT_NAMES = {EVENT_JOB_MISSED: "missed", EVENT_JOB_MAX_INSTANCES: "max_instances", EVENT_JOB_ERROR: "error"}
+
+
+@dataclass(frozen=True)
+class SentimentSnapshot:
+    """
+        Неизменяемый снимок опубликованных результатов.
+        results - отображение только для чтения (вложенные словари тоже), generation растёт с каждой публикацией.
+    """
+    results: Mapping
+    generation: int
+    created_at: float
+
+    @classmethod
+    def build(cls, results, generation):
+        frozen = {key: MappingProxyType(dict(value)) for key, value in results.items()}
+        return cls(results=MappingProxyType(frozen), generation=generation, created_at=time.time())
+
+    @classmethod
+    def empty(cls):
+        return cls(results=MappingProxyType({}), generation=0, created_at=time.time())
+
+    @property
+    def age_seconds(self):
+        return time.time() - self.created_at
+
+    def to_dict(self):
+        """Изменяемая копия results из обычных словарей - например, для json.dumps."""
+        return {key: dict(value) for key, value in self.results.items()}
+
+
+def utc_timestamp(published_at):
+    """Unix-время для строки UTC '%Y-%m-%d %H:%M:%S' из БД; None, если строку не удалось разобрать."""
+    try:
+        return datetime.strptime(published_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
 # Класс для основного приложения
 class MainApp:
     """
@@ -25,122 +74,331 @@ class MainApp:
             [currency + "_average_all"] - среднее настроение по всем новостям
             [currency + "_average_strong"] - среднее настроение по новостям с вероятностью > 0.7
             [currency + "_count_stats"] - статистика по количеству новостей (положительные, нейтральные и т.д.)
+
+        get_sentiment_results() возвращает отображение только для чтения (MappingProxyType, вложенные тоже):
+        json.dumps его не принимает, а dict() копирует только верхний уровень. Для сериализации -
+        get_sentiment_snapshot().to_dict().
     """
-    def __init__(self):
-        self.parser = CryptoPanicParser()
-        self.sentiment_analysis = SentimentAnalysis()
+    def __init__(self, batch_size=32, window_hours=12, strong_threshold=0.7, fetch_interval_minutes=30, expire_interval_minutes=5,
+                 sentiment_backend="torch", num_threads=None, inference_workers=0, near_duplicates=False, near_duplicate_threshold=0.85,
+                 db_path='cryptonews.db', metrics_port=None, retention_days=None, retention_archive_path=None, retention_interval_hours=24):
+        if retention_days is not None and retention_days * 24 < window_hours:
+            raise ValueError("retention_days не может быть короче окна анализа window_hours")
+        # Парсер, БД и модель создаются при первом обращении (см. свойства ниже)
+        self.sentiment_analysis = SentimentAnalysis(
+            backend=sentiment_backend, num_threads=num_threads, workers=inference_workers
+        )  # Модель грузится лениво
+        self.deduplicator = TitleDeduplicator(near_duplicates=near_duplicates, threshold=near_duplicate_threshold)
+        self.last_pass_stats = {}  # Статистика последнего анализа: сколько прогонов модели сэкономлено
+        self.headline_log_every = 50  # В лог пишется каждый N-й заголовок с оценкой, остальные - в итоговой сводке
+        self.db_path = db_path
+        self.batch_size = batch_size  # Размер батча для модели
+        self.window_hours = window_hours  # Окно анализа новостей, часов
+        self.strong_threshold = strong_threshold  # Порог вероятности для "_average_strong"
+        self.fetch_interval_minutes = fetch_interval_minutes
+        self.expire_interval_minutes = expire_interval_minutes
+        self.retention_days = retention_days  # Новости старше удаляются из БД (или переносятся в архив); None - хранить всё
+        self.retention_archive_path = retention_archive_path  # Файл SQLite, куда переносятся удаляемые новости
+        self.retention_interval_hours = retention_interval_hours
         self.scheduler = BackgroundScheduler()
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_ERROR)
+        self.metrics_port = metrics_port  # Порт HTTP-эндпоинта /metrics; None - только get_metrics() внутри процесса
+        self.metrics_server = None
+
+        # Опубликованные результаты - неизменяемый снимок; читатели берут ссылку без блокировок,
+        # писатель собирает новый снимок целиком и подменяет ссылку одним присваиванием
+        self._snapshot = SentimentSnapshot.empty()
+        self.results_lock = threading.Lock()  # Только между писателями (номер поколения)
+
+        # Скользящие окна оценок по монетам с инкрементальными средними
+        self.windows = self._create_windows()
+        self.window_loaded = False
+        self.pipeline_lock = threading.Lock()  # Загрузка, анализ и очистка окна не пересекаются
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """Показатели, которые вычисляются из состояния приложения в момент чтения метрик."""
+        REGISTRY.gauge("sentiment_results_age_seconds", "Возраст опубликованных результатов, сек", lambda: self._snapshot.age_seconds)
+        REGISTRY.gauge("sentiment_results_generation", "Номер поколения опубликованных результатов", lambda: self._snapshot.generation)
+        REGISTRY.gauge(
+            "sentiment_window_news", "Новостей в скользящем окне по монетам",
+            lambda: {currency: len(window) for currency, window in self.windows.items()}, label="coin"
+        )
+        REGISTRY.gauge("db_file_size_bytes", "Размер файла БД вместе с WAL, байт", lambda: self.data_base.file_size())
+
+    def _on_job_event(self, event):
+        name = JOB_EVENT_NAMES[event.code]
+        SCHEDULER_EVENTS.inc(job=event.job_id, event=name)
+        logger.warning(f"Задание планировщика {event.job_id}: {name}")
 
-        self.sentiment_results = defaultdict(list) 
-        self.results_lock = threading.Lock()  # Добавили блокировку
+    def get_metrics(self):
+        """Метрики процесса: {имя: {метки: значение}} (см. metrics.MetricsRegistry.snapshot)."""
+        return REGISTRY.snapshot()
+
+    @cached_property
+    def parser(self):
+        return CryptoPanicParser(data_base=self.data_base)
+
+    @cached_property
+    def data_base(self):
+        return MainDatabase(self.db_path)
+
+    def warmup(self):
+        """
+            Загружает модель и БД заранее и пишет отчёт о запуске: время импорта, загрузки модели, прогрева и память.
+            Вызывается из start(); можно вызвать вручную, чтобы первый запуск конвейера не платил за инициализацию.
+        """
+        started = time.perf_counter()
+        self.data_base
+        warmup_seconds = self.sentiment_analysis.warmup()
+        report = {
+            'since_import_seconds': round(time.perf_counter() - _IMPORT_STARTED, 2),
+            'model_load_seconds': round(self.sentiment_analysis.load_seconds or 0.0, 2),
+            'warmup_seconds': round(warmup_seconds, 2),
+            'total_warmup_seconds': round(time.perf_counter() - started, 2),
+            'peak_memory_mb': memory_usage_mb(),
+        }
+        logger.info(f"🚀 Отчёт о запуске: {report}")
+        return report
 
     def fetch_and_store_news(self):
-        """Метод для получения новостей с CryptoPanic каждые 30 минут."""
+        """Метод для получения новостей с CryptoPanic; возвращает id добавленных записей."""
         logger.info(f"Запрос новостей с CryptoPanic в {datetime.now()}")
-        self.parser.run()  # Получаем и сохраняем новости в базе данных
+        return self.parser.run()  # Получаем и сохраняем новости в базе данных
+
+    @timed(PIPELINE_SECONDS, stage="run_pipeline")
+    def run_pipeline(self):
+        """
+            Конвейер: загрузка новостей -> оценка только добавленных записей -> очистка окна -> публикация результатов.
+            При первом запуске окно загружается целиком из БД.
+        """
+        with self.pipeline_lock:
+            try:
+                inserted_ids = self.fetch_and_store_news()
+                if not self.window_loaded:
+                    self._rebuild_window()
+                elif inserted_ids:
+                    self._analyze_news(self.data_base.get_news_by_ids(inserted_ids))
+                expired = self._expire_window()
+                if inserted_ids or expired or not self.window_loaded:
+                    self._publish_results()
+                self.window_loaded = True
+            except Exception:
+                # Новости уже в БД, но в окно могли попасть не все: следующий запуск пересоберёт окно целиком
+                self.window_loaded = False
+                raise
+
+    @timed(PIPELINE_SECONDS, stage="expire_window")
+    def expire_window(self):
+        """Периодически удаляет из окна устаревшие новости и обновляет результаты, если что-то изменилось."""
+        with self.pipeline_lock:
+            if self.window_loaded and self._expire_window():
+                self._publish_results()
 
+    @timed(PIPELINE_SECONDS, stage="group_and_analyze_news")
     def group_and_analyze_news(self):
-        """Метод для группировки новостей и анализа настроений каждые 12 часов."""
+        """Полный пересчёт: группировка новостей за окно и анализ настроений заново."""
+        with self.pipeline_lock:
+            self._rebuild_window()
+            self._publish_results()
+            self.window_loaded = True
+
+    @timed(PIPELINE_SECONDS, stage="retention")
+    def apply_retention(self):
+        """Удаляет (или переносит в архив) новости старше retention_days и возвращает освободившееся место файлу БД."""
+        removed = self.data_base.apply_retention(self.retention_days, archive_path=self.retention_archive_path)
+        self.data_base.incremental_vacuum()
+        return removed
+
+    def _create_windows(self):
+        return {
+            currency: RollingSentimentWindow(window_seconds=self.window_hours * 3600, strong_threshold=self.strong_threshold)
+            for currency in COIN_KEYWORDS
+        }
+
+    def _rebuild_window(self):
         logger.info(f"Группировка новостей и анализ настроений в {datetime.now()}")
-        data_base = MainDatabase()
-        grouped_news = data_base.get_news_by_currency()
-        
-        # self.sentiment_results.clear()  # Очищаем старые результаты
-        sentiment_aggregates = defaultdict(list)  # Для сбора вероятностей Для всех новостей
-        threshold_aggregates = defaultdict(list)  # Только те, у кого одна из вероятностей > 0.7
-        sentiment_counts_by_currency = {}  # Статистика по категориям
-    
-        temp_results = defaultdict(list)
+        self.windows = self._create_windows()
+        self._analyze_news(self.data_base.get_news_by_currency(hours=self.window_hours))
 
+    def _analyze_news(self, grouped_news):
+        """Оценивает новости {currency: [(id, title, currency, published_at), ...]} и добавляет их в окно."""
+        scores = self.score_news(grouped_news)
+
+        headline_log = LogSampler(logger, every=self.headline_log_every)
+        bad_time_ids = set()
         for currency, news_items in grouped_news.items():
-            logger.info(f"Обрабатываем новости для {currency}")
-            sentiment_counts = {'negative': 0, 'neutral': 0, 'positive': 0, 'undefined': 0}
-
-            for title, currency_tags in news_items:
-                sentiment = self.sentiment_analysis.analyze_sentiment(title) # Анализ настроений
-                self.sentiment_results[currency].append((title, sentiment))
-
-                sentiment_vector = [
-                    sentiment['negative'],
-                    sentiment['neutral'],
-                    sentiment['positive']
-                ]
-
-                sentiment_aggregates[currency].append(sentiment_vector)
-                max_value = max(sentiment_vector)
-
-                # Анализируем — если одна из вероятностей выше 0.7, засчитываем как уверенное настроение
-                if max_value > 0.7:
-                    max_index = sentiment_vector.index(max_value)
-                    sentiment_label = ['negative', 'neutral', 'positive'][max_index]
-                    sentiment_counts[sentiment_label] += 1
-                    threshold_aggregates[currency].append(sentiment_vector)
-                else:
-                    sentiment_counts['undefined'] += 1
-
-                logger.info(f"Заголовок: {title}")
-                logger.info(f"Настроение: {sentiment}")
-            
-            sentiment_counts_by_currency[currency] = sentiment_counts
+            if news_items:
+                logger.info(f"Обрабатываем новости для {currency}")
+            # БД отдаёт новые первыми; в окно добавляем по возрастанию времени, чтобы не сдвигать буфер на каждой вставке
+            for news_id, title, currency_tags, published_at in reversed(news_items):
+                ts = utc_timestamp(published_at)
+                if ts is None:
+                    bad_time_ids.add(news_id)
+                    continue
+                self.windows[currency].add(ts, scores[news_id], item_id=news_id)
+                headline_log.log("Заголовок: %s | Настроение: %s", title, dict(zip(LABELS, scores[news_id])))
+        headline_log.summary("Заголовки добавлены в окно")
+        if bad_time_ids:
+            logger.warning(f"Пропущены новости с неразборчивым временем публикации: {sorted(bad_time_ids)}")
 
-        with self.results_lock:
-            self.sentiment_results.clear() # Очищаем старые результаты
-            self.sentiment_results.update(temp_results)
+    def score_news(self, grouped_news):
+        """Оценки {news_id: (negative, neutral, positive)} для новостей {currency: [(id, title, currency, published_at), ...]}."""
+        # Оценки берутся из кэша в БД; модель запускается только для новостей без оценки,
+        # причём одним пакетным вызовом и по одному разу на новость, даже если у неё несколько монет
+        data_base = self.data_base
+        model_key = self.sentiment_analysis.model_key
+        pairs = sum(len(news_items) for news_items in grouped_news.values())  # Пары (монета, новость)
+        titles_by_id = {news_id: title for news_items in grouped_news.values() for news_id, title, currency_tags, published_at in news_items}
+        scores = data_base.get_cached_sentiments(titles_by_id.keys(), model_key)
+        missing_ids = [news_id for news_id in titles_by_id if news_id not in scores]
+        forward_passes = 0
+        if missing_ids:
+            # Тот же заголовок другой новости мог быть оценён в прошлых проходах - берём его оценку по ключу заголовка
+            keys = {news_id: title_key(titles_by_id[news_id]) for news_id in missing_ids}
+            by_title = data_base.get_sentiments_by_title(keys.values(), model_key)
+            new_scores = {news_id: by_title[keys[news_id]] for news_id in missing_ids if keys[news_id] in by_title}
+
+            # Оставшиеся одинаковые (и, если включено, почти одинаковые) заголовки оцениваются один раз
+            to_score = [news_id for news_id in missing_ids if news_id not in new_scores]
+            if to_score:
+                unique_titles, mapping = self.deduplicator.group([titles_by_id[news_id] for news_id in to_score])
+                probs = self.sentiment_analysis.predict_proba(unique_titles, batch_size=self.batch_size)
+                forward_passes = len(unique_titles)
+                new_scores.update(zip(to_score, probs[mapping].tolist()))
+            data_base.save_sentiments(new_scores, model_key, title_keys=keys)
+            scores.update(new_scores)
+        self.last_pass_stats = {
+            'pairs': pairs,
+            'news': len(titles_by_id),
+            'cached': len(titles_by_id) - len(missing_ids),
+            'duplicates': len(missing_ids) - forward_passes,
+            'forward_passes': forward_passes,
+            'saved_passes': pairs - forward_passes,
+        }
+        HEADLINES_SCORED.inc(self.last_pass_stats['cached'], source="cache")
+        HEADLINES_SCORED.inc(self.last_pass_stats['duplicates'], source="duplicate")
+        HEADLINES_SCORED.inc(forward_passes, source="model")
+        logger.info(
+            f"Новостей к анализу: {len(titles_by_id)} ({pairs} с учётом монет), из кэша: {self.last_pass_stats['cached']}, "
+            f"дубликатов: {self.last_pass_stats['duplicates']}, прогонов модели: {forward_passes}, "
+            f"сэкономлено прогонов: {self.last_pass_stats['saved_passes']}"
+        )
+        return scores
+
+    def _expire_window(self):
+        """Удаляет из окон новости старше window_hours; возвращает количество удалённых."""
+        now = time.time()
+        expired = sum(window.expire(now) for window in self.windows.values())
+        if expired:
+            logger.info(f"Из окна удалено устаревших новостей: {expired}")
+        return expired
+
+    def _publish_results(self):
+        """Публикует средние и статистику, уже посчитанные скользящими окнами, и сохраняет их в историю."""
+        results_by_coin = {
+            currency: (window.average_all(), window.average_strong(), window.count_stats())
+            for currency, window in self.windows.items()
+        }
+        self._set_results(results_by_coin)
+        self.data_base.save_sentiment_snapshot(time.time(), results_by_coin)
+
+    def warm_start_results(self):
+        """Подставляет последние сохранённые результаты (не старше окна), пока не прошёл первый анализ."""
+        cutoff = time.time() - self.window_hours * 3600
+        latest = {
+            currency: (average_all, average_strong, counts)
+            for currency, (ts, average_all, average_strong, counts) in self.data_base.get_latest_sentiment().items()
+            if ts >= cutoff and currency in self.windows
+        }
+        if latest:
+            logger.info(f"Результаты восстановлены из истории для {len(latest)} монет")
+            self._set_results(latest)
+        return bool(latest)
+
+    def _set_results(self, results_by_coin):
+        """Собирает из results_by_coin {currency: (average_all, average_strong, count_stats)} новый снимок и публикует его."""
+        results = {}
+        for currency, (avg_sentiment, avg_filtered_sentiment, counts) in results_by_coin.items():
             # Усреднение по всем
-            for currency, values in sentiment_aggregates.items():
-                average = np.mean(values, axis=0)
-                avg_sentiment = {
-                    'negative': round(average[0], 3),
-                    'neutral': round(average[1], 3),
-                    'positive': round(average[2], 3)
-                }
+            if avg_sentiment is not None:
                 logger.info(f"📊 Среднее настроение по {currency} (все): {avg_sentiment}")
                 logger_res.debug(f"📊 Среднее настроение по {currency} (все): {avg_sentiment}")
-                self.sentiment_results[currency + "_average_all"] = avg_sentiment
-
-            # Усреднение по выборке с > 0.7
-            for currency, values in threshold_aggregates.items():
-                if values:
-                    average = np.mean(values, axis=0)
-                    avg_filtered_sentiment = {
-                        'negative': round(average[0], 3),
-                        'neutral': round(average[1], 3),
-                        'positive': round(average[2], 3)
-                    }
-                    logger.info(f"📊 Среднее настроение по {currency} (только > 0.7): {avg_filtered_sentiment}")
-                    logger_res.debug(f"📊 Среднее настроение по {currency} (только > 0.7): {avg_filtered_sentiment}")
-                    self.sentiment_results[currency + "_average_strong"] = avg_filtered_sentiment
+                results[currency + "_average_all"] = avg_sentiment
+
+            # Усреднение по выборке с > strong_threshold
+            if avg_filtered_sentiment is not None:
+                logger.info(f"📊 Среднее настроение по {currency} (только > {self.strong_threshold}): {avg_filtered_sentiment}")
+                logger_res.debug(f"📊 Среднее настроение по {currency} (только > {self.strong_threshold}): {avg_filtered_sentiment}")
+                results[currency + "_average_strong"] = avg_filtered_sentiment
 
             # Выводим статистику
-            for currency, counts in sentiment_counts_by_currency.items():
-                logger.info(f"📈 Кол-во новостей по {currency}: {counts}")
-                logger_res.debug(f"📈 Кол-во новостей по {currency}: {counts}")
-                self.sentiment_results[currency + "_count_stats"] = counts
-            logger_res.debug(f"\n")
+            logger.info(f"📈 Кол-во новостей по {currency}: {counts}")
+            logger_res.debug(f"📈 Кол-во новостей по {currency}: {counts}")
+            results[currency + "_count_stats"] = counts
+        logger_res.debug(f"\n")
 
-    def get_sentiment_results(self):
         with self.results_lock:
-            return dict(self.sentiment_results)
+            self._snapshot = SentimentSnapshot.build(results, generation=self._snapshot.generation + 1)
+
+    @property
+    def sentiment_results(self):
+        return self._snapshot.results
+
+    def get_sentiment_snapshot(self):
+        """Текущий снимок результатов целиком: results, generation, created_at (всегда согласованный)."""
+        return self._snapshot
+
+    def get_sentiment_results(self):
+        """Результаты последнего анализа: неизменяемое отображение (MappingProxyType), O(1) и без блокировок."""
+        return self._snapshot.results
 
     def start(self):
         """Запуск программы."""
-        # Запрашиваем новости каждые 30 минут (сразу и потом каждые 30 мин)
+        # Пока модель грузится и идёт первый анализ, отдаём последние сохранённые результаты
+        self.warm_start_results()
+
+        # Модель загружаем до добавления заданий: next_run_time=now, посчитанный раньше, к старту планировщика
+        # был бы просрочен больше чем на misfire_grace_time, и первый запуск конвейера был бы пропущен
+        self.warmup()
+
+        # Конвейер: загрузка новостей и анализ только добавленных записей (сразу и потом каждые 30 мин).
+        # Один job с max_instances=1, поэтому анализ не пересекается с незавершённой записью в БД
         self.scheduler.add_job(
-            self.fetch_and_store_news,
+            self.run_pipeline,
             'interval',
-            minutes=30,
-            next_run_time=datetime.now()
+            id="run_pipeline",
+            minutes=self.fetch_interval_minutes,
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
         )
 
-        # Группируем новости и анализируем их каждые 12 часов (тоже сразу)
+        # Очистка окна от устаревших новостей между загрузками
         self.scheduler.add_job(
-            self.group_and_analyze_news,
+            self.expire_window,
             'interval',
-            # hours=12,
-            minutes=31,
-            next_run_time=datetime.now()
+            id="expire_window",
+            minutes=self.expire_interval_minutes,
+            max_instances=1,
+            coalesce=True
         )
 
+        # Очистка БД от старых новостей: раз в retention_interval_hours, первый раз вскоре после запуска
+        if self.retention_days is not None:
+            self.scheduler.add_job(
+                self.apply_retention,
+                'interval',
+                id="apply_retention",
+                hours=self.retention_interval_hours,
+                next_run_time=datetime.now() + timedelta(minutes=5),
+                max_instances=1,
+                coalesce=True
+            )
+
+        if self.metrics_port is not None:
+            self.metrics_server = MetricsServer(port=self.metrics_port).start()
+
         # Стартуем планировщик
         self.scheduler.start()
 
@@ -150,11 +408,30 @@ class MainApp:
                 time.sleep(1)
         except (KeyboardInterrupt, SystemExit):
             self.scheduler.shutdown()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+            self.sentiment_analysis.close()
+            self.data_base.close()
+            LoggerManager.shutdown()
+
+# Синглтон, который создаётся при первом обращении: импорт модуля не грузит модель и не трогает БД
+_main_app_instance = None
+_main_app_lock = threading.Lock()
+
+def get_main_app():
+    global _main_app_instance
+    if _main_app_instance is None:
+        with _main_app_lock:
+            if _main_app_instance is None:
+                _main_app_instance = MainApp()
+    return _main_app_instance
 
-# Синглтон или экземпляр, который можно импортировать
-main_app_instance = MainApp()
+def __getattr__(name):
+    # Совместимость с `from sentiment_app import main_app_instance`
+    if name == "main_app_instance":
+        return get_main_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Запуск приложения
 if __name__ == "__main__":
-    app = MainApp()
-    app.start()
\ No newline at end of file
+    get_main_app().start()
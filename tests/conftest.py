@@ -0,0 +1,24 @@
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# parser/config.py с ключом API не хранится в репозитории; для тестов достаточно значений-заглушек
+try:
+    import parser.config  # noqa: F401
+except ImportError:
+    config = types.ModuleType("parser.config")
+    config.CryptoPanic_API_KEY = "test-key"
+    config.CryptoPanic_url = "https://cryptopanic.test/api/v1/posts/"
+    config.COIN_KEYWORDS = {
+        "Bitcoin": ["bitcoin", "btc", "btc/usd", "btcusdt"],
+        "Ethereum": ["ethereum", "eth", "eth/usd", "ethusdt"],
+        "Solana": ["solana", "sol", "sol/usdt"],
+        "Ripple": ["ripple", "xrp", "xrp/usd", "xrpusdt"],
+        "Dogecoin": ["dogecoin", "doge", "doge/usd", "dogeusdt"],
+        "Tether": ["tether", "usdt", "usdt/usd", "usd/usdt"],
+    }
+    sys.modules["parser.config"] = config
@@ -0,0 +1,32 @@
+from parser.coin_matcher import CoinMatcher
+
+KEYWORDS = {
+    "Bitcoin": ["bitcoin", "btc", "btc/usd", "btcusdt"],
+    "Ethereum": ["ethereum", "eth", "eth/usd", "ethusdt"],
+    "Solana": ["solana", "sol", "sol/usdt"],
+    "Shiba Inu": ["shiba inu", "shib"],
+}
+
+
+def test_keywords_match_whole_words_only():
+    matcher = CoinMatcher(KEYWORDS)
+    assert matcher.find("A new solution for the consensus method") == set()
+    assert matcher.find("Solana and ETH rally") == {"Solana", "Ethereum"}
+    assert matcher.find("SOL, eth; BTC!") == {"Solana", "Ethereum", "Bitcoin"}
+    assert matcher.find("Bitcoins are not a keyword form") == set()
+    assert matcher.find("") == set()
+
+
+def test_pairs_and_phrases():
+    matcher = CoinMatcher(KEYWORDS)
+    assert matcher.find("btc/usd breaks resistance") == {"Bitcoin"}
+    assert matcher.find("ETH/BTC ratio slides") == {"Ethereum", "Bitcoin"}
+    assert matcher.find("SOL/USDT listed") == {"Solana"}
+    assert matcher.find("Shiba Inu burns tokens") == {"Shiba Inu"}
+    assert matcher.find("shiba inuit art") == set()
+
+
+def test_find_batch_keeps_order():
+    matcher = CoinMatcher(KEYWORDS)
+    texts = ["eth method", "solution", "BTCUSDT pump", None]
+    assert matcher.find_batch(texts) == [{"Ethereum"}, set(), {"Bitcoin"}, set()]
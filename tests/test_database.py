@@ -0,0 +1,82 @@
+from unittest import mock
+
+import db_sentiment_app
+from db_sentiment_app import to_utc_string
+
+
+def test_to_utc_string_fast_path_handles_zulu_suffix():
+    with mock.patch.object(db_sentiment_app.date_parser, "parse", side_effect=AssertionError("dateutil fallback")):
+        assert to_utc_string("2024-03-01T12:30:45Z") == "2024-03-01 12:30:45"
+        assert to_utc_string("2024-03-01T12:30:45.123456Z") == "2024-03-01 12:30:45"
+        assert to_utc_string("2024-03-01T15:30:45+03:00") == "2024-03-01 12:30:45"
+        assert to_utc_string("2024-03-01 12:30:45") == "2024-03-01 12:30:45"
+
+
+def test_to_utc_string_falls_back_to_dateutil_and_none():
+    assert to_utc_string("Fri, 01 Mar 2024 12:30:45 GMT") == "2024-03-01 12:30:45"
+    assert to_utc_string("n/a") is None
+    assert to_utc_string(None) is None
+
+
+def averages(negative, neutral, positive):
+    return {'negative': negative, 'neutral': neutral, 'positive': positive}
+
+
+def counts(negative=0, neutral=0, positive=0, undefined=0):
+    return {'negative': negative, 'neutral': neutral, 'positive': positive, 'undefined': undefined}
+
+
+def test_sentiment_history_round_trip(tmp_path):
+    import time
+
+    import numpy as np
+
+    from sentiment_app import MainApp
+
+    app = MainApp(db_path=str(tmp_path / "news.db"))
+    data_base = app.data_base
+    base = (int(time.time()) // 3600 - 2) * 3600  # Начало часа два часа назад
+    data_base.save_sentiment_snapshot(base, {
+        "Bitcoin": (averages(0.2, 0.3, 0.5), averages(0.1, 0.1, 0.8), counts(positive=2, undefined=1)),
+        "Ethereum": (averages(0.6, 0.3, 0.1), None, counts(undefined=1)),
+    })
+    data_base.save_sentiment_snapshot(base + 1800, {
+        "Bitcoin": (averages(0.4, 0.3, 0.3), None, counts(undefined=3)),
+    })
+    data_base.save_sentiment_snapshot(base + 3600, {
+        "Bitcoin": (averages(0.1, 0.1, 0.8), averages(0.0, 0.1, 0.9), counts(positive=4)),
+    })
+
+    raw = data_base.get_sentiment_history("Bitcoin")
+    assert raw['ts'].tolist() == [base, base + 1800, base + 3600]
+    assert raw['average_all'].shape == (3, 3)
+    assert raw['average_strong'].shape == (3, 3)
+    assert raw['count_stats'].shape == (3, 4)
+    assert np.isnan(raw['average_strong'][1]).all()
+    assert raw['count_stats'][1].tolist() == [0, 0, 0, 3]
+
+    window = data_base.get_sentiment_history("Bitcoin", start_ts=base + 1, end_ts=base + 3600)
+    assert window['ts'].tolist() == [base + 1800, base + 3600]
+
+    hourly = data_base.get_sentiment_history("Bitcoin", bucket_seconds=3600)
+    assert hourly['ts'].tolist() == [base, base + 3600]
+    np.testing.assert_allclose(hourly['average_all'][0], [0.3, 0.3, 0.4])
+    np.testing.assert_allclose(hourly['average_strong'][0], [0.1, 0.1, 0.8])  # NULL не участвует в AVG
+    np.testing.assert_allclose(hourly['count_stats'][0], [0, 0, 1, 2])
+    assert np.isnan(data_base.get_sentiment_history("Ethereum", bucket_seconds=3600)['average_strong']).all()
+    assert data_base.get_sentiment_history("Solana")['average_all'].shape == (0, 3)
+
+    latest = data_base.get_latest_sentiment()
+    assert latest["Bitcoin"] == (base + 3600, averages(0.1, 0.1, 0.8), averages(0.0, 0.1, 0.9), counts(positive=4))
+    assert latest["Ethereum"] == (base, averages(0.6, 0.3, 0.1), None, counts(undefined=1))
+
+    # Снимки не старше окна анализа подставляются в результаты до первого прогона
+    assert app.warm_start_results()
+    results = app.get_sentiment_results()
+    assert results["Bitcoin_average_strong"] == averages(0.0, 0.1, 0.9)
+    assert "Ethereum_average_strong" not in results
+    app.window_hours = 2  # Снимок Ethereum старше двух часов, последний снимок Bitcoin - нет
+    app._snapshot = type(app._snapshot).empty()
+    assert app.warm_start_results()
+    assert "Ethereum_average_all" not in app.get_sentiment_results()
+    data_base.close()
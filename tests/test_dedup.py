@@ -0,0 +1,30 @@
+import zlib
+
+import numpy as np
+
+from mood.dedup import TitleDeduplicator, normalize_title, title_key, _MAX_HASH, _MERSENNE_PRIME
+
+
+def test_signature_matches_exact_universal_hash():
+    dedup = TitleDeduplicator(near_duplicates=True)
+    text = normalize_title("Bitcoin ETF inflows hit a record high")
+    shingles = {text[i:i + dedup.shingle_size] for i in range(len(text) - dedup.shingle_size + 1)}
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    expected = [
+        min(((int(a) * x + int(b)) % _MERSENNE_PRIME) & _MAX_HASH for x in hashes)
+        for a, b in zip(dedup._a, dedup._b)
+    ]
+    assert dedup._signature(text).tolist() == expected
+
+
+def test_groups_exact_and_near_duplicates():
+    titles = [
+        "Bitcoin ETF inflows hit a record high this week",
+        "BITCOIN ETF inflows hit a record high this week!",
+        "Bitcoin ETF inflows hit a record high this week - report",
+        "Ethereum developers schedule the next network upgrade",
+    ]
+    unique, mapping = TitleDeduplicator(near_duplicates=True, threshold=0.7).group(titles)
+    assert unique == [titles[0], titles[3]]
+    assert np.array_equal(mapping, [0, 0, 0, 1])
+    assert title_key(titles[0]) == title_key(titles[1]) != title_key(titles[2])
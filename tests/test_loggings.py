@@ -0,0 +1,22 @@
+from logging.handlers import QueueHandler
+
+from loggings import LoggerManager
+
+
+def test_single_listener_thread_writes_each_logger_to_own_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(LoggerManager, "LOG_DIR", str(tmp_path))
+    LoggerManager.shutdown()  # Поток, остановленный shutdown(), запускается заново первым новым логгером
+    manager = LoggerManager()
+    first = manager.get_named_logger("queue_test_a")
+    second = manager.get_named_logger("queue_test_b")
+    first.debug("запись a")
+    second.debug("запись b")
+
+    assert len(LoggerManager._listeners) == 1
+    assert all(isinstance(h, QueueHandler) for h in first.handlers + second.handlers)
+    assert first.handlers[0].queue is second.handlers[0].queue
+
+    LoggerManager.shutdown()
+    assert "запись a" in (tmp_path / "queue_test_a.log").read_text(encoding="utf-8")
+    assert "запись b" not in (tmp_path / "queue_test_a.log").read_text(encoding="utf-8")
+    assert "запись b" in (tmp_path / "queue_test_b.log").read_text(encoding="utf-8")
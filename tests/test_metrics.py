@@ -0,0 +1,40 @@
+from metrics import MetricsRegistry
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    counter = registry.counter("app_events_total", "События")
+    counter.inc(outcome="ok")
+    counter.inc(2, outcome='bad "quote"\\path\nline')
+    histogram = registry.histogram("app_seconds", "Задержки", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="fetch")
+    registry.gauge("app_window", "Новостей в окне", lambda: {"BTC": 3, "ETH": 0}, label="coin")
+    registry.gauge("app_age_seconds", "Возраст", lambda: 1.5)
+    registry.gauge("app_broken", "Ошибка при чтении", lambda: 1 / 0)
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:2] == ["# HELP app_events_total События", "# TYPE app_events_total counter"]
+    assert 'app_events_total{outcome="ok"} 1' in lines
+    assert 'app_events_total{outcome="bad \\"quote\\"\\\\path\\nline"} 2' in lines
+
+    assert "# TYPE app_seconds histogram" in lines
+    assert 'app_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'app_seconds_bucket{stage="fetch",le="1.0"} 2' in lines
+    assert 'app_seconds_bucket{stage="fetch",le="+Inf"} 3' in lines
+    assert 'app_seconds_sum{stage="fetch"} 5.55' in lines
+    assert 'app_seconds_count{stage="fetch"} 3' in lines
+
+    assert "# TYPE app_window gauge" in lines
+    assert 'app_window{coin="BTC"} 3' in lines
+    assert 'app_window{coin="ETH"} 0' in lines
+    assert "app_age_seconds 1.5" in lines
+    assert "# TYPE app_broken gauge" in lines
+    assert not any(line.startswith("app_broken ") or line.startswith("app_broken{") for line in lines)
+
+
+def test_registry_returns_existing_metric_for_same_name():
+    registry = MetricsRegistry()
+    assert registry.counter("c_total", "a") is registry.counter("c_total", "b")
+    assert registry.histogram("h_seconds", "a") is registry.histogram("h_seconds", "b")
+    assert registry.snapshot()["c_total"] == {}
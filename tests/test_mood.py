@@ -0,0 +1,24 @@
+from huggingface_hub import constants
+
+from mood.mood import SentimentAnalysis
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def test_model_key_uses_commit_hash_from_local_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(constants, "HF_HUB_OFFLINE", True)
+    monkeypatch.setattr(constants, "HF_HUB_CACHE", str(tmp_path))
+    refs = tmp_path / "models--cardiffnlp--twitter-roberta-base-sentiment" / "refs"
+    refs.mkdir(parents=True)
+    (refs / "main").write_text(SHA + "\n")
+
+    model = SentimentAnalysis()
+    assert model.model_key == f"cardiffnlp/twitter-roberta-base-sentiment@{SHA}"
+    assert SentimentAnalysis(backend="torch_int8").model_key.endswith(f"@{SHA}#int8")
+    assert not model.is_loaded
+
+
+def test_model_key_keeps_pinned_sha_without_lookup(monkeypatch):
+    monkeypatch.setattr(constants, "HF_HUB_OFFLINE", False)
+    monkeypatch.setattr("huggingface_hub.HfApi.model_info", lambda *args, **kwargs: 1 / 0)
+    assert SentimentAnalysis(revision=SHA).resolved_revision == SHA
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+from db_sentiment_app import MainDatabase
+from parser.news_parser import CryptoPanicParser
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_post(post_id):
+    return {
+        "id": post_id,
+        "title": f"Bitcoin headline {post_id}",
+        "url": f"https://cryptopanic.test/news/{post_id}/",
+        "published_at": (START + timedelta(minutes=post_id)).isoformat().replace("+00:00", "Z"),
+        "currencies": [{"code": "BTC", "title": "Bitcoin"}],
+    }
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+    def json(self):
+        return self._payload
+
+
+class FakeCryptoPanic:
+    """Подмена requests.Session: лента постов от новых к старым, страницы по page_size, ETag и сбои по номеру страницы."""
+
+    def __init__(self, page_size=10):
+        self.page_size = page_size
+        self.last_id = 0
+        self.fail_pages = set()
+        self.requests = []
+
+    def publish(self, count):
+        self.last_id += count
+
+    @property
+    def etag(self):
+        return f'"{self.last_id}"'
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+        query.update(params or {})
+        page = int(query.get("page", 1))
+        self.requests.append(page)
+        assert query.get("auth_token") == "test-key" or "auth_token" in (params or {})
+
+        if page == 1 and (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        if page in self.fail_pages:
+            return FakeResponse(502)
+
+        ids = list(range(self.last_id, 0, -1))
+        chunk = ids[(page - 1) * self.page_size:page * self.page_size]
+        has_next = page * self.page_size < len(ids)
+        payload = {
+            "results": [make_post(post_id) for post_id in chunk],
+            "next": f"https://cryptopanic.test/api/v1/posts/?auth_token=test-key&page={page + 1}" if has_next else None,
+        }
+        return FakeResponse(200, payload, {"ETag": self.etag})
+
+
+@pytest.fixture
+def feed():
+    return FakeCryptoPanic(page_size=10)
+
+
+@pytest.fixture
+def parser(tmp_path, feed):
+    news_parser = CryptoPanicParser(data_base=MainDatabase(str(tmp_path / "news.db")))
+    news_parser.MAX_PAGES = 3
+    news_parser.session = feed
+    return news_parser
+
+
+def stored_ids(parser):
+    rows = parser.data_base.get_connection().execute("SELECT url FROM news").fetchall()
+    return {int(url.rstrip("/").rsplit("/", 1)[1]) for (url,) in rows}
+
+
+def test_stops_at_high_water(parser, feed):
+    feed.publish(25)
+    assert len(parser.run()) == 10  # Первый запуск - только первая страница
+
+    feed.publish(5)
+    feed.requests.clear()
+    assert len(parser.run()) == 5
+    assert feed.requests == [1]
+    assert parser.data_base.get_fetch_state(parser.SOURCE)['last_post_id'] == 30
+
+
+def test_page_cap_resumes_without_losing_posts(parser, feed):
+    feed.publish(10)
+    parser.run()
+
+    feed.publish(100)  # Простой: 100 новых постов, за запуск - 3 страницы по 10
+    assert len(parser.run()) == 30
+    state = parser.data_base.get_fetch_state(parser.SOURCE)
+    assert state['resume_url'] and "auth_token" not in state['resume_url']
+    assert state['last_post_id'] == 110
+
+    feed.publish(4)  # Новые посты между запусками сдвигают страницы
+    for _ in range(10):
+        parser.run()
+        if not parser.data_base.get_fetch_state(parser.SOURCE)['resume_url']:
+            break
+    assert stored_ids(parser) == set(range(1, 115))
+    assert parser.data_base.get_fetch_state(parser.SOURCE)['resume_published_at'] is None
+
+
+def test_not_modified_keeps_state(parser, feed):
+    feed.publish(5)
+    parser.run()
+    state = parser.data_base.get_fetch_state(parser.SOURCE)
+    assert state['etag'] == feed.etag
+
+    assert parser.run() == []
+    assert parser.data_base.get_fetch_state(parser.SOURCE) == state
+
+
+def test_error_mid_pagination_keeps_high_water(parser, feed):
+    feed.publish(10)
+    parser.run()
+
+    feed.publish(25)
+    feed.fail_pages = {2}
+    assert len(parser.run()) == 10  # Первая страница сохранена
+    assert parser.data_base.get_fetch_state(parser.SOURCE)['last_post_id'] == 10  # Отметка не сдвинута
+
+    feed.fail_pages = set()
+    parser.run()
+    assert stored_ids(parser) == set(range(1, 36))
+    assert parser.data_base.get_fetch_state(parser.SOURCE)['last_post_id'] == 35
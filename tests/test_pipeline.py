@@ -0,0 +1,138 @@
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from sentiment_app import MainApp
+
+
+class FakeModel:
+    model_key = "fake@1"
+
+    def __init__(self):
+        self.fail_next = False
+        self.calls = 0
+
+    def predict_proba(self, texts, batch_size=32):
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("inference failed")
+        self.calls += len(texts)
+        rows = [[zlib.crc32(text.encode()) % 7 + 1, zlib.crc32(text.encode()) % 5 + 1, 3] for text in texts]
+        probs = np.array(rows, dtype=np.float32).reshape(len(texts), 3)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def warmup(self):
+        return 0.0
+
+    def close(self):
+        pass
+
+
+def make_posts(first_id, count, title="Bitcoin and Ethereum headline"):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": post_id,
+            "title": f"{title} {post_id}",
+            "url": f"https://cryptopanic.test/news/{post_id}/",
+            "published_at": (now - timedelta(minutes=post_id % 600)).isoformat(),
+            "currencies": None,
+        }
+        for post_id in range(first_id + count - 1, first_id - 1, -1)
+    ]
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = MainApp(db_path=str(tmp_path / "news.db"), retention_days=None)
+    app.sentiment_analysis = FakeModel()
+    app.pending_posts = []
+
+    def fetch_and_store_news():
+        posts, app.pending_posts = app.pending_posts, []
+        return app.data_base.cryptopanic_save_news(posts, app.parser.extract_coin)
+
+    app.fetch_and_store_news = fetch_and_store_news
+    return app
+
+
+def window_sizes(app):
+    return {coin: len(window) for coin, window in app.windows.items()}
+
+
+def test_failed_incremental_pass_rebuilds_window(app):
+    app.pending_posts = make_posts(1, 20)
+    app.run_pipeline()
+
+    app.pending_posts = make_posts(100, 15)
+    app.sentiment_analysis.fail_next = True
+    with pytest.raises(RuntimeError):
+        app.run_pipeline()
+    assert not app.window_loaded
+
+    app.run_pipeline()  # Новых постов нет, но окно пересобирается из БД
+    incremental = window_sizes(app)
+    app.group_and_analyze_news()
+    assert incremental == window_sizes(app)
+    assert incremental["Bitcoin"] == 35
+
+
+def test_headline_scored_once_across_passes(app):
+    app.pending_posts = make_posts(1, 5, title="Bitcoin ETF approved")
+    app.run_pipeline()
+    model_calls = app.sentiment_analysis.calls
+
+    # Тот же заголовок у другого издания (другой URL), другой регистр и пунктуация - в следующей загрузке
+    reposts = make_posts(1, 5, title="BITCOIN ETF approved!")
+    for post in reposts:
+        post["url"] = post["url"].replace("/news/", "/news/repost-")
+    app.pending_posts = reposts
+    app.run_pipeline()
+
+    assert app.sentiment_analysis.calls == model_calls
+    assert app.last_pass_stats['duplicates'] == 5
+
+
+def test_unparsable_published_at_does_not_stop_pipeline(app):
+    broken = make_posts(1, 1, title="Bitcoin headline without date")
+    broken[0]["published_at"] = "n/a"
+    app.pending_posts = make_posts(10, 3) + broken
+    app.run_pipeline()
+
+    connection = app.data_base.get_connection()
+    stored = connection.execute("SELECT published_at FROM news WHERE url = ?", (broken[0]["url"],)).fetchone()
+    assert stored == (None,)
+
+    # Строка, сохранённая старой версией как есть, проходит фильтр окна, но пропускается при разборе
+    connection.execute(
+        "INSERT INTO news (title, url, published_at, currency, summary, content) VALUES (?, ?, ?, ?, '', '')",
+        ("Bitcoin legacy row", "https://cryptopanic.test/news/legacy/", "n/a", "Bitcoin"),
+    )
+    legacy_id = connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+    connection.execute("INSERT INTO news_currency (news_id, currency, published_at) VALUES (?, 'Bitcoin', 'n/a')", (legacy_id,))
+    connection.commit()
+
+    app.window_loaded = False
+    app.pending_posts = make_posts(20, 2)
+    app.run_pipeline()
+    assert app.window_loaded
+    assert window_sizes(app)["Bitcoin"] == 5
+    assert app.get_sentiment_snapshot().generation == 2
+
+
+def test_snapshot_to_dict_is_json_serializable(app):
+    import json
+
+    app.pending_posts = make_posts(1, 5)
+    app.run_pipeline()
+    snapshot = app.get_sentiment_snapshot()
+    with pytest.raises(TypeError):
+        json.dumps(app.get_sentiment_results())
+
+    plain = snapshot.to_dict()
+    assert json.loads(json.dumps(plain)) == plain
+    assert plain["Bitcoin_count_stats"] == dict(snapshot.results["Bitcoin_count_stats"])
+    plain["Bitcoin_count_stats"]["positive"] = -1  # Копия не меняет опубликованный снимок
+    assert snapshot.results["Bitcoin_count_stats"]["positive"] != -1
@@ -0,0 +1,31 @@
+import gzip
+import json
+
+import pytest
+
+import replay
+
+
+POSTS = [{"id": i, "title": f"Bitcoin {i}", "url": f"https://cryptopanic.test/news/{i}/"} for i in range(5)]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    (tmp_path / "a_response.json").write_text(json.dumps({"count": 3, "next": None, "results": POSTS[:3]}))
+    with gzip.open(tmp_path / "b_posts.jsonl.gz", "wt") as file:
+        for post in POSTS[3:]:
+            file.write(json.dumps(post) + "\n")
+    return tmp_path
+
+
+def test_reads_api_responses_and_jsonl(archive):
+    assert [post["id"] for post in replay.iter_archived_posts([str(archive)])] == [0, 1, 2, 3, 4]
+
+
+def test_large_json_without_ijson_fails_loudly(archive, monkeypatch):
+    monkeypatch.setattr(replay, "ijson", None)
+    assert len(list(replay.iter_archived_posts([str(archive)]))) == 5  # Небольшой файл читается целиком
+
+    monkeypatch.setattr(replay, "MAX_JSON_WITHOUT_IJSON_MB", 0)
+    with pytest.raises(RuntimeError, match="ijson"):
+        list(replay.iter_archived_posts([str(archive / "a_response.json")]))
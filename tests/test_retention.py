@@ -0,0 +1,74 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from db_sentiment_app import MainDatabase
+from sentiment_app import MainApp
+
+
+def make_posts(ages_days):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": i,
+            "title": f"Bitcoin headline {i}",
+            "url": f"https://cryptopanic.test/news/{i}/",
+            "published_at": (now - timedelta(days=age)).isoformat(),
+            "currencies": None,
+        }
+        for i, age in enumerate(ages_days)
+    ]
+
+
+def save(data_base, posts):
+    return data_base.cryptopanic_save_news(posts, lambda text, currencies: ["Bitcoin"])
+
+
+def count(connection, table):
+    return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_retention_is_opt_in(tmp_path):
+    assert MainApp(db_path=str(tmp_path / "news.db")).retention_days is None
+
+
+def test_retention_archives_old_news(tmp_path):
+    data_base = MainDatabase(str(tmp_path / "news.db"))
+    ids = save(data_base, make_posts([0, 1, 40, 45, 50]))
+    data_base.save_sentiments({news_id: (0.2, 0.3, 0.5) for news_id in ids}, "m@1")
+
+    archive_path = str(tmp_path / "archive.db")
+    assert data_base.apply_retention(30, archive_path=archive_path, batch_size=2) == 3
+
+    connection = data_base.get_connection()
+    assert [count(connection, table) for table in ("news", "news_currency", "news_sentiment")] == [2, 2, 2]
+    archive = sqlite3.connect(archive_path)
+    assert [count(archive, table) for table in ("news", "news_currency", "news_sentiment")] == [3, 3, 3]
+    archive.close()
+    data_base.close()
+
+
+def test_bad_archive_path_is_logged_not_raised(tmp_path):
+    data_base = MainDatabase(str(tmp_path / "news.db"))
+    save(data_base, make_posts([40]))
+    assert data_base.apply_retention(30, archive_path=str(tmp_path / "missing" / "archive.db")) == 0
+    assert count(data_base.get_connection(), "news") == 1
+    data_base.close()
+
+
+def test_legacy_database_is_not_vacuumed_on_startup(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE news (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT UNIQUE, "
+                   "published_at TEXT, currency TEXT, summary TEXT, content TEXT)")
+    legacy.commit()
+    legacy.close()
+
+    data_base = MainDatabase(path)
+    assert data_base.get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    assert data_base.convert_to_incremental_vacuum()
+    assert data_base.get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    data_base.close()
+
+    fresh = MainDatabase(str(tmp_path / "fresh.db"))
+    assert fresh.get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    fresh.close()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from mood.mood import LABELS
+from mood.rolling_window import RollingSentimentWindow
+
+
+def brute_force(entries, strong_threshold):
+    """Средние и счётчики прямым пересчётом по записям [(timestamp, probs), ...]."""
+    probs = np.array([p for _, p in entries], dtype=np.float64).reshape(-1, len(LABELS))
+    strong = probs[probs.max(axis=1) > strong_threshold] if len(probs) else probs
+    counts = dict.fromkeys(LABELS + ['undefined'], 0)
+    for row in probs:
+        counts[LABELS[int(np.argmax(row))] if row.max() > strong_threshold else 'undefined'] += 1
+    as_dict = lambda values: {label: round(float(value), 3) for label, value in zip(LABELS, values)}
+    return (
+        as_dict(np.mean(probs, axis=0)) if len(probs) else None,
+        as_dict(np.mean(strong, axis=0)) if len(strong) else None,
+        counts,
+    )
+
+
+def window_state(window):
+    return window.average_all(), window.average_strong(), window.count_stats()
+
+
+def test_matches_brute_force_with_out_of_order_inserts_growth_and_expiry():
+    rng = np.random.default_rng(0)
+    window = RollingSentimentWindow(window_seconds=100, strong_threshold=0.7, capacity=4)
+    entries = {}  # id -> (timestamp, probs)
+    now = 0.0
+    for step in range(400):
+        now += rng.uniform(0, 2)
+        # Треть записей - "догрузка" с временем раньше последней вставленной
+        timestamp = now - rng.uniform(0, 60) if rng.random() < 0.3 else now
+        probs = rng.dirichlet(np.full(len(LABELS), 0.4))
+        assert window.add(timestamp, probs, item_id=step)
+        entries[step] = (timestamp, probs)
+        assert not window.add(timestamp, probs, item_id=step)  # Повтор id игнорируется
+
+        if step % 7 == 0:
+            expired = window.expire(now)
+            alive = {key: value for key, value in entries.items() if value[0] >= now - 100}
+            assert expired == len(entries) - len(alive)
+            entries = alive
+
+        assert len(window) == len(entries)
+        expected = brute_force(list(entries.values()), 0.7)
+        average_all, average_strong, counts = window_state(window)
+        assert counts == expected[2]
+        assert average_all == pytest.approx(expected[0], abs=1.5e-3)
+        if expected[1] is None:
+            assert average_strong is None
+        else:
+            assert average_strong == pytest.approx(expected[1], abs=1.5e-3)
+
+    # Буфер вырос и остаётся упорядоченным по времени
+    assert len(window._timestamps) > 4
+    logical = (window._head + np.arange(len(window))) % len(window._timestamps)
+    assert np.all(np.diff(window._timestamps[logical]) >= 0)
+
+
+def test_expired_id_can_be_added_again_and_empty_window_resets():
+    window = RollingSentimentWindow(window_seconds=10, capacity=2)
+    window.add(0.0, [0.9, 0.05, 0.05], item_id=1)
+    window.add(5.0, [0.2, 0.3, 0.5], item_id=2)
+    assert window.expire(12.0) == 1
+    assert window.count_stats() == {'negative': 0, 'neutral': 0, 'positive': 0, 'undefined': 1}
+    assert window.average_strong() is None
+
+    assert window.expire(100.0) == 1
+    assert window_state(window) == (None, None, dict.fromkeys(LABELS + ['undefined'], 0))
+    assert window.add(100.0, [0.9, 0.05, 0.05], item_id=1)
+    assert window.average_all() == {'negative': 0.9, 'neutral': 0.05, 'positive': 0.05}